@@ -0,0 +1,205 @@
+"""Persistent response cache for LLM generations."""
+import functools
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "test-agent" / "llm_responses.sqlite"
+
+
+class ResponseCache:
+    """SQLite-backed cache mapping a prompt hash to the raw LLM response."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 1000,
+    ):
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT, created_at REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, full_prompt: str) -> str:
+        """Hash the model name and the fully materialized prompt."""
+        return hashlib.sha256((model_name + "\0" + full_prompt).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on a miss or an expired entry."""
+        row = self._conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if self.ttl and time.time() - created_at > self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        return response
+
+    def set(self, key: str, response: str):
+        """Store a response and evict the oldest entries beyond max_entries."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+            (key, response, time.time()),
+        )
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def clear(self):
+        """Drop every cached response."""
+        self._conn.execute("DELETE FROM responses")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+DEFAULT_SEMANTIC_CACHE_PATH = DEFAULT_CACHE_PATH.with_name("llm_semantic.sqlite")
+
+
+class SemanticCache:
+    """Embedding-similarity cache that serves near-duplicate specifications.
+
+    Requires the optional ``sentence-transformers`` and ``faiss-cpu`` packages.
+    Entries are partitioned by namespace (model name and target type) so that
+    similar wording for different kinds of targets never share a response.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        threshold: float = 0.90,
+        model_name: str = "all-MiniLM-L6-v2",
+        ttl: float = 7 * 24 * 3600,
+    ):
+        try:
+            import faiss
+            import numpy as np
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SemanticCache requires 'sentence-transformers' and 'faiss-cpu'"
+            ) from e
+
+        self._faiss = faiss
+        self._np = np
+        self._encoder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.path = Path(path or DEFAULT_SEMANTIC_CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic ("
+            "namespace TEXT, embedding BLOB, response TEXT, created_at REAL)"
+        )
+        if self.ttl:
+            self._conn.execute("DELETE FROM semantic WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+        self._indexes: Dict[str, Any] = {}
+        # Per namespace, (embedding, response, created_at) in index order
+        self._entries: Dict[str, List[Tuple[Any, str, float]]] = {}
+        for namespace, blob, response, created_at in self._conn.execute(
+            "SELECT namespace, embedding, response, created_at FROM semantic ORDER BY rowid"
+        ):
+            vec = np.frombuffer(blob, dtype=np.float32).reshape(1, -1)
+            self._add_to_index(namespace, vec, response, created_at)
+
+    def _embed(self, text: str):
+        vec = self._encoder.encode([text], normalize_embeddings=True)
+        return self._np.asarray(vec, dtype=self._np.float32)
+
+    def _add_to_index(self, namespace: str, vec, response: str, created_at: float):
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = self._indexes[namespace] = self._faiss.IndexFlatIP(vec.shape[1])
+            self._entries[namespace] = []
+        index.add(vec)
+        self._entries[namespace].append((vec, response, created_at))
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def _evict_expired(self, namespace: str):
+        """Rebuild a namespace's index without its expired entries."""
+        entries = self._entries.pop(namespace)
+        del self._indexes[namespace]
+        for vec, response, created_at in entries:
+            if not self._expired(created_at):
+                self._add_to_index(namespace, vec, response, created_at)
+        self._conn.execute(
+            "DELETE FROM semantic WHERE namespace = ? AND created_at < ?",
+            (namespace, time.time() - self.ttl),
+        )
+        self._conn.commit()
+
+    def lookup(self, namespace: str, text: str) -> Optional[str]:
+        """Return the response of the most similar live entry above the threshold."""
+        index = self._indexes.get(namespace)
+        if index is None or index.ntotal == 0:
+            return None
+        scores, ids = index.search(self._embed(text), 1)
+        if scores[0][0] < self.threshold:
+            return None
+        _, response, created_at = self._entries[namespace][ids[0][0]]
+        if self._expired(created_at):
+            # An expired best match may hide a live one just behind it
+            self._evict_expired(namespace)
+            return self.lookup(namespace, text)
+        return response
+
+    def add(self, namespace: str, text: str, response: str):
+        vec = self._embed(text)
+        created_at = time.time()
+        self._add_to_index(namespace, vec, response, created_at)
+        self._conn.execute(
+            "INSERT INTO semantic (namespace, embedding, response, created_at) VALUES (?, ?, ?, ?)",
+            (namespace, vec.tobytes(), response, created_at),
+        )
+        self._conn.commit()
+
+    def wrap(self, generate: Callable[..., Awaitable[str]], namespace: str = "") -> Callable[..., Awaitable[str]]:
+        """Wrap an async ``generate(prompt, context)`` with semantic lookups.
+
+        The specification in ``context`` is embedded when present, since the
+        templated prompt is dominated by boilerplate shared across requests.
+        """
+
+        @functools.wraps(generate)
+        async def wrapped(prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+            context = context or {}
+            text = context.get("specification") or prompt
+            ns = f"{namespace}:{context.get('target_type', '')}"
+            cached = self.lookup(ns, text)
+            if cached is not None:
+                logger.info("llm_semantic_cache_hit", namespace=ns)
+                return cached
+            result = await generate(prompt, context)
+            self.add(ns, text, result)
+            return result
+
+        return wrapped
+
+    def close(self):
+        self._conn.close()
@@ -1,18 +1,131 @@
 import os
+import re
+import asyncio
+import contextlib
+import hashlib
+import functools
+import itertools
+from collections import OrderedDict, deque
 import google.generativeai as genai
-from tenacity import retry, stop_after_attempt, wait_exponential
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 import structlog
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+from agent.cache import ResponseCache, SemanticCache
 
 logger = structlog.get_logger()
 
-class GeminiClient:
-    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash"):
+_configured_api_key: Optional[str] = None
+
+# Fenced code blocks; a fence line may carry surrounding horizontal whitespace
+_PYTHON_FENCE_RE = re.compile(r"^[^\S\n]*```python[^\n]*\n(.*?)\n?^[^\S\n]*```[^\S\n]*$", re.MULTILINE | re.DOTALL)
+_BARE_FENCE_RE = re.compile(r"^[^\S\n]*```[^\S\n]*\n(.*?)\n?^[^\S\n]*```[^\S\n]*$", re.MULTILINE | re.DOTALL)
+
+# Failures worth another attempt: timeouts, dropped connections, rate limits and
+# server-side errors. Anything else (bad key, blocked prompt) fails the same way again.
+TRANSIENT_ERRORS = (
+    # Distinct from the builtin TimeoutError before Python 3.11
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+    google_exceptions.TooManyRequests,
+    google_exceptions.InternalServerError,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+
+# Output cap applied in latency-optimized mode; shorter generations return sooner
+LATENCY_OPTIMIZED_MAX_OUTPUT_TOKENS = 2048
+
+
+def _get_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """Return a model on the SDK's shared client, so every client shares one pooled transport.
+
+    ``genai.configure`` is global and discards the SDK's cached clients (and
+    their open connections), so it is only called again when the API key
+    changes. Models are not cached: one built under another key would send
+    its requests with whichever key was configured last.
+    """
+    global _configured_api_key
+    if api_key != _configured_api_key:
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
-        self.conversation_history = []
+        _configured_api_key = api_key
+    return genai.GenerativeModel(model_name)
+
+
+class _CodeBlockTracker:
+    """Incrementally detect the end of the first ```python block in streamed text"""
+
+    def __init__(self):
+        self._pending = ""
+        self._in_code_block = False
+        self._has_content = False
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def feed(self, text: str) -> bool:
+        """Consume a chunk; return True once a non-empty python block has closed"""
+        self._pending += text
+        *lines, self._pending = self._pending.split('\n')
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith('```python'):
+                self._in_code_block = True
+                self._has_content = False
+            elif stripped == '```' and self._in_code_block:
+                self._in_code_block = False
+                if self._has_content:
+                    return True
+            elif self._in_code_block and stripped:
+                self._has_content = True
+        return False
+
+
+class GeminiClient:
+    # Completed or in-flight generations remembered per client, keyed by prompt hash
+    MEMO_SIZE = 128
+    # Entries kept in conversation_history, and how many of them are echoed into prompts
+    MAX_HISTORY = 8
+    PROMPT_HISTORY = 3
+    # Seconds one streamed request may take before it is abandoned and retried
+    REQUEST_TIMEOUT = 45.0
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.5-flash",
+        cache: Optional[ResponseCache] = None,
+        latency_optimized: Optional[bool] = None,
+        request_timeout: Optional[float] = None,
+    ):
+        self.model_name = model_name
+        self.request_timeout = request_timeout or self.REQUEST_TIMEOUT
+        self.model = _get_model(api_key, model_name)
+        if latency_optimized is None:
+            latency_optimized = os.getenv("LLM_LATENCY_OPTIMIZED") == "1"
+        self.latency_optimized = latency_optimized
+        self.generation_config = (
+            {"max_output_tokens": LATENCY_OPTIMIZED_MAX_OUTPUT_TOKENS} if latency_optimized else None
+        )
+        # Read once per client (after the CLI has loaded .env) rather than on every call
+        self.debug = os.getenv("LLM_DEBUG") == "1"
+        self.conversation_history: "deque[Dict[str, str]]" = deque(maxlen=self.MAX_HISTORY)
+        self._history_prefix: Optional[str] = None
+        self._memo: "OrderedDict[str, asyncio.Future[str]]" = OrderedDict()
+        if cache is None and os.getenv("LLM_CACHE") == "1":
+            cache = ResponseCache()
+        self.cache = cache
+        if os.getenv("LLM_SEMANTIC_CACHE") == "1":
+            try:
+                self.generate = SemanticCache().wrap(self.generate, namespace=model_name)
+            except ImportError as e:
+                logger.warning("semantic_cache_unavailable", error=str(e))
+
+    @retry(
+        retry=retry_if_exception_type(TRANSIENT_ERRORS),
+        stop=stop_after_attempt(3),
+        # Jittered, so requests rate-limited together do not retry together
+        wait=wait_random_exponential(multiplier=1, max=10),
+    )
     async def generate(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate response with retry logic and context management
         
@@ -25,31 +138,106 @@ class GeminiClient:
         """
         try:
             full_prompt = self._build_prompt(prompt, context)
-            if os.getenv("LLM_DEBUG") == "1":
-                print("\n=== LLM REQUEST =====================================")
-                print(f"Model: {self.model._model_name}")
-                print(full_prompt[:2000])
-                print("=== END REQUEST ====================================\n")
-                
-            response = await self.model.generate_content_async(full_prompt)
-            response_text = response.text
-            
-            if os.getenv("LLM_DEBUG") == "1":
-                print("\n=== LLM RESPONSE ====================================")
-                print(response_text[:2000])
-                print("=== END RESPONSE ===================================\n")
-                
-            logger.info("llm_generation", prompt_length=len(full_prompt), response_length=len(response_text))
-            self.conversation_history.append({"prompt": prompt, "response": response_text})
-            
-            # Extract only the Python code block from the response
-            code_block = self._extract_python_code(response_text)
-            return code_block or response_text  # Fallback to full response if no code block found
-            
+            key = hashlib.blake2b(full_prompt.encode(), digest_size=16).hexdigest()
+            task = self._memo.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._generate_uncached(prompt, full_prompt))
+                self._memo[key] = task
+                task.add_done_callback(functools.partial(self._forget_failed, key))
+                while len(self._memo) > self.MEMO_SIZE:
+                    self._memo.popitem(last=False)
+            else:
+                # Identical prompt in flight or already answered during this session
+                self._memo.move_to_end(key)
+                logger.info("llm_request_coalesced", prompt_length=len(full_prompt))
+            return await asyncio.shield(task)
+
         except Exception as e:
             logger.error("llm_error", error=str(e))
             raise
 
+    def _forget_failed(self, key: str, task: "asyncio.Future[str]"):
+        """Drop failed generations from the memo so a retry hits the API again"""
+        if (task.cancelled() or task.exception() is not None) and self._memo.get(key) is task:
+            del self._memo[key]
+
+    async def _generate_uncached(self, prompt: str, full_prompt: str) -> str:
+        """Send a fully built prompt, consulting the persistent cache first"""
+        if self.debug:
+            print("\n=== LLM REQUEST =====================================")
+            print(f"Model: {self.model._model_name}")
+            print(full_prompt[:2000])
+            print("=== END REQUEST ====================================\n")
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(self._cache_model_id(), full_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("llm_cache_hit", prompt_length=len(full_prompt))
+                # A hit is still part of the conversation later prompts refer back to
+                self._record_history(prompt, cached)
+                return self._extract_python_code(cached) or cached
+
+        # A hung request raises TimeoutError, which the retry policy on generate() bounds
+        response_text = await asyncio.wait_for(self._stream_response(full_prompt), self.request_timeout)
+        
+        if self.debug:
+            print("\n=== LLM RESPONSE ====================================")
+            print(response_text[:2000])
+            print("=== END RESPONSE ===================================\n")
+            
+        logger.info("llm_generation", prompt_length=len(full_prompt), response_length=len(response_text))
+        if cache_key is not None:
+            self.cache.set(cache_key, response_text)
+        self._record_history(prompt, response_text)
+        
+        # Extract only the Python code block from the response
+        code_block = self._extract_python_code(response_text)
+        return code_block or response_text  # Fallback to full response if no code block found
+
+    def _cache_model_id(self) -> str:
+        """Model identifier for cache keys; capped generations are kept apart"""
+        return f"{self.model_name}:latency" if self.latency_optimized else self.model_name
+
+    async def _stream_response(self, full_prompt: str) -> str:
+        """Stream the response, stopping as soon as a complete python block arrives"""
+        response = await self.model.generate_content_async(
+            full_prompt, generation_config=self.generation_config, stream=True
+        )
+        tracker = _CodeBlockTracker()
+        chunks = []
+        # Breaking out closes the public chunk iterator at once instead of at garbage collection
+        async with contextlib.aclosing(aiter(response)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk.text)
+                if tracker.feed(chunk.text):
+                    # The code block is all we return, so drop the rest of the stream
+                    break
+        return "".join(chunks)
+
+    async def generate_many(
+        self,
+        items: List[Tuple[str, Optional[Dict[str, Any]]]],
+        concurrency: int = 8,
+    ) -> List[Union[str, BaseException]]:
+        """Generate responses for several prompts concurrently
+        
+        Args:
+            items: (prompt, context) pairs to send to the LLM
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            list: Results in input order; a failed request yields its exception
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(prompt: str, context: Optional[Dict[str, Any]]) -> str:
+            async with sem:
+                return await self.generate(prompt, context)
+
+        return await asyncio.gather(*(one(p, c) for p, c in items), return_exceptions=True)
+
     def _extract_python_code(self, text: str) -> str:
         """Extract Python code block from markdown response
         
@@ -59,53 +247,40 @@ class GeminiClient:
         Returns:
             str: The extracted Python code block, or empty string if not found
         """
-        # Look for code blocks marked with ```python or ```
-        code_blocks = []
-        in_code_block = False
-        current_block = []
-        
-        for line in text.split('\n'):
-            if line.strip().startswith('```python'):
-                in_code_block = True
-                current_block = []
-                continue
-            elif line.strip() == '```' and in_code_block:
-                in_code_block = False
-                if current_block:  # Only add non-empty blocks
-                    code_blocks.append('\n'.join(current_block))
-                continue
-                
-            if in_code_block:
-                current_block.append(line)
-        
-        # If no python-marked blocks found, try unmarked code blocks
-        if not code_blocks:
-            in_code_block = False
-            current_block = []
-            
-            for line in text.split('\n'):
-                if line.strip() == '```':
-                    if in_code_block and current_block:
-                        code_blocks.append('\n'.join(current_block))
-                    in_code_block = not in_code_block
-                    current_block = []
-                    continue
-                    
-                if in_code_block:
-                    current_block.append(line)
-        
-        # Return the first non-empty code block, or empty string if none found
-        return next((block for block in code_blocks if block.strip()), '')
+        if "```" not in text:
+            return ''
+        # Prefer blocks marked with ```python, then fall back to unmarked ``` blocks;
+        # the python pass is skipped outright when no such marker occurs
+        patterns = (_PYTHON_FENCE_RE, _BARE_FENCE_RE) if "```python" in text else (_BARE_FENCE_RE,)
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                block = match.group(1)
+                if block.strip():
+                    return block
+        return ''
+
+    def _record_history(self, prompt: str, response: str):
+        """Append a truncated exchange and invalidate the rendered history block"""
+        self.conversation_history.append({"prompt": prompt[:100], "response": response[:100]})
+        self._history_prefix = None
 
     def _build_prompt(self, prompt: str, context: Optional[Dict[str, Any]]) -> str:
         """Build prompt with context and conversation history"""
         sections = []
         sections.append("You are an expert test generator for Django applications using pytest.")
         if self.conversation_history:
-            sections.append("\nPrevious context:")
-            for item in self.conversation_history[-3:]:
-                sections.append(f"User: {item['prompt'][:100]}...")
-                sections.append(f"Assistant: {item['response'][:100]}...")
+            if self._history_prefix is None:
+                recent = itertools.islice(
+                    self.conversation_history,
+                    max(0, len(self.conversation_history) - self.PROMPT_HISTORY),
+                    None,
+                )
+                lines = ["\nPrevious context:"]
+                for item in recent:
+                    lines.append(f"User: {item['prompt']}...")
+                    lines.append(f"Assistant: {item['response']}...")
+                self._history_prefix = "\n".join(lines)
+            sections.append(self._history_prefix)
         if context:
             sections.append(f"\nCurrent context:\n{context}")
         sections.append(f"\nCurrent request:\n{prompt}")
@@ -113,4 +288,5 @@ class GeminiClient:
 
     def clear_history(self):
         """Clear conversation history for new session"""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._history_prefix = None
@@ -1,9 +1,22 @@
 """Prompt templates and context dataclasses for Phase 2 enhanced test generation."""
 from __future__ import annotations
 
+import functools
 import json
+import string
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+except ImportError:  # orjson is optional; stdlib json produces the same layout
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
 
 __all__ = [
     "TestContext",
@@ -11,6 +24,21 @@ __all__ = [
 ]
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_template(template: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+    """Split a str.format template into (literal, field name) pieces once.
+
+    Returns None for templates using conversions, format specs or indexed
+    fields, which are left to str.format.
+    """
+    pieces = []
+    for literal, name, spec, conversion in string.Formatter().parse(template):
+        if name is not None and (spec or conversion or not name.isidentifier()):
+            return None
+        pieces.append((literal, name))
+    return tuple(pieces)
+
+
 @dataclass
 class TestContext:
     """Holds contextual information the LLM needs to generate a test."""
@@ -24,25 +52,37 @@ class TestContext:
 
     def to_prompt_context(self) -> str:
         """Convert selected fields to a JSON string fed to the LLM."""
-        return json.dumps(
+        return _dumps(
             {
                 "target_type": self.target_type,
                 "target_info": self.target_info,
                 "previous_attempts": len(self.previous_attempts),
                 "has_feedback": bool(self.user_feedback),
-            },
-            indent=2,
+            }
         )
 
 
 class PromptTemplates:
     """Central place for reusable prompt templates."""
 
+    @staticmethod
+    def render(template: str, **fields: Any) -> str:
+        """Fill a template like ``template.format(**fields)`` without re-parsing it."""
+        pieces = _compile_template(template)
+        if pieces is None:
+            return template.format(**fields)
+        parts = []
+        for literal, name in pieces:
+            parts.append(literal)
+            if name is not None:
+                parts.append(str(fields[name]))
+        return "".join(parts)
+
     # ------------------------------------------------------------------
     # System / role prompts
     # ------------------------------------------------------------------
     SYSTEM_PROMPT_DJANGO = (
-        "You are an expert Django test engineer specializing in pytest."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n""
+        "You are an expert Django test engineer specializing in pytest."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n"
         "Key principles:\n"
         "1. Generate complete, runnable pytest code\n"
         "2. Include all necessary imports\n"
@@ -55,7 +95,7 @@ class PromptTemplates:
     )
 
     SYSTEM_PROMPT_FLASK = (
-        "You are an expert Python test engineer specializing in testing Flask applications with pytest."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n""
+        "You are an expert Python test engineer specializing in testing Flask applications with pytest."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n"
         "Key principles:\n"
         "1. Generate complete, runnable pytest code for Flask.\n"
         "2. Include all necessary imports.\n"
@@ -68,7 +108,7 @@ class PromptTemplates:
     )
 
     SYSTEM_PROMPT_NODE = (
-        "You are an expert JavaScript/TypeScript test engineer specializing in testing Node.js applications, particularly those using the Express.js framework. You use Jest for testing."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n""
+        "You are an expert JavaScript/TypeScript test engineer specializing in testing Node.js applications, particularly those using the Express.js framework. You use Jest for testing."" Your role is to generate high-quality, comprehensive tests based on natural language specifications.\n\n"
         "Key principles:\n"
         "1. Generate complete, runnable Jest test code for Node.js/Express.js.\n"
         "2. Use `require` or `import` for modules as appropriate.\n"
@@ -82,9 +122,9 @@ class PromptTemplates:
 
     # ------------------------------------------------------------------
     ANALYZE_SPECIFICATION = (
-        "Analyze this test specification and extract key information:\n\n""
-        "Specification: \"{specification}\"\n\n""
-        "Context about the codebase:\n{codebase_context}\n\n""
+        "Analyze this test specification and extract key information:\n\n"
+        "Specification: \"{specification}\"\n\n"
+        "Context about the codebase:\n{codebase_context}\n\n"
         "Please identify:\n"
         "1. What is being tested (endpoint, model, function, etc.)\n"
         "2. The specific behavior or requirement to verify\n"
@@ -92,22 +132,22 @@ class PromptTemplates:
         "4. Expected outcomes or assertions\n"
         "5. Any edge cases mentioned or implied\n"
         "6. HTTP methods involved (for API tests)\n"
-        "7. Authentication/permission requirements\n\n""
+        "7. Authentication/permission requirements\n\n"
         "Provide a structured analysis in JSON format."
     )
 
     # ------------------------------------------------------------------
     GENERATE_MODEL_TEST = (
-        "Generate a pytest test for a Django model based on this specification:\n\n""
-        "Specification: \"{specification}\"\n\n""
-        "Model Information:\n{model_info}\n\n""
-        "Related Models:\n{related_models}\n\n""
+        "Generate a pytest test for a Django model based on this specification:\n\n"
+        "Specification: \"{specification}\"\n\n"
+        "Model Information:\n{model_info}\n\n"
+        "Related Models:\n{related_models}\n\n"
         "Requirements:\n"
         "1. Test the specific behavior described\n"
         "2. Use appropriate Django model testing patterns\n"
         "3. Include necessary fixtures and test data\n"
         "4. Test both success and failure cases\n"
-        "5. Add clear docstrings explaining what's being tested\n\n""
+        "5. Add clear docstrings explaining what's being tested\n\n"
         "Generate complete, runnable pytest code."
     )
 
@@ -1,11 +1,15 @@
 
 """Base classes for code analysis."""
 import ast
+import os
+import sqlite3
 from pathlib import Path
-from typing import Dict, List, Any, Set
+from typing import Dict, FrozenSet, Iterator, List, Any, Optional, Set
 
 import structlog
 
+from analyzer.parse_cache import ParseCache
+
 logger = structlog.get_logger()
 
 
@@ -13,21 +17,46 @@ class FileScanner:
     """Locate files of interest in a project tree."""
 
     PATTERNS: Dict[str, List[str]] = {}
+    SKIP_DIRS: FrozenSet[str] = frozenset({".git", "__pycache__", "venv", "env", ".venv", "node_modules"})
+
+    # Filename -> category, derived from PATTERNS once per scanner class
+    NAME_TO_KIND: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        name_to_kind: Dict[str, str] = {}
+        for cat, patterns in cls.PATTERNS.items():
+            for pattern in patterns:
+                name_to_kind.setdefault(pattern, cat)
+        cls.NAME_TO_KIND = name_to_kind
 
     def __init__(self, project_root: str):
         self.root = Path(project_root).resolve()
         self.files: Dict[str, List[Path]] = {k: [] for k in self.PATTERNS}
 
-    def scan(self):
-        skip = {".git", "__pycache__", "venv", "env", ".venv"}
-        for path in self.root.rglob("*.py"):
-            if any(part in skip for part in path.parts):
+    def walk(self) -> Iterator[os.DirEntry]:
+        """Yield every file under the root, pruning SKIP_DIRS before descent."""
+        skip = self.SKIP_DIRS
+        stack = [str(self.root)]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
                 continue
-            name = path.name.lower()
-            for cat, patterns in self.PATTERNS.items():
-                if name in patterns:
-                    self.files[cat].append(path)
-                    break
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip:
+                            stack.append(entry.path)
+                    else:
+                        yield entry
+
+    def scan(self):
+        name_to_kind = self.NAME_TO_KIND
+        for entry in self.walk():
+            cat = name_to_kind.get(entry.name.lower())
+            if cat is not None:
+                self.files[cat].append(Path(entry.path))
 
 
 class BaseAnalyzer:
@@ -44,18 +73,36 @@ class BaseAnalyzer:
     def _parse_file(self, file_path: Path, category: str):
         raise NotImplementedError
 
+    def compact_context(self) -> Dict[str, Any]:
+        """Return a small projection of the analysis suitable for LLM prompts."""
+        raise NotImplementedError
+
+    def _open_parse_cache(self, cache_path: Path, version: int) -> Optional[ParseCache]:
+        """Open a per-project ParseCache, or return None if it cannot be created."""
+        db_path = self.root / cache_path
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            # The cache lives in the analyzed repo, so keep it out of that repo's git status
+            gitignore = db_path.parent / ".gitignore"
+            if not gitignore.exists():
+                gitignore.write_text("# Created by test-agent automatically.\n*\n")
+            return ParseCache(db_path, version=version)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"AST cache disabled: {e}")
+            return None
+
     def _get_app_name(self, file_path: Path) -> str:
         """Derive app name from file path."""
         return file_path.parent.name
 
-    def _get_node_value(self, node: ast.AST) -> str:
+    @staticmethod
+    def _get_node_value(node: ast.AST) -> str:
         """Safely extract value from AST node."""
-        if isinstance(node, ast.Str):
-            return node.s
-        elif isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            return f"{self._get_node_value(node.value)}.{node.attr}"
-        elif isinstance(node, ast.Constant):
+        node_type = type(node)
+        if node_type is ast.Constant:
             return str(node.value)
+        if node_type is ast.Name:
+            return node.id
+        if node_type is ast.Attribute:
+            return f"{BaseAnalyzer._get_node_value(node.value)}.{node.attr}"
         return ""
@@ -1,12 +1,17 @@
 
 """Django-specific project analyzer."""
 import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set, Tuple
 
 import structlog
 
 from analyzer.base_analyzer import FileScanner, BaseAnalyzer
+from analyzer.parse_cache import ParseCache
+
+__all__ = ["DjangoAnalyzer", "DjangoFileScanner"]
 
 logger = structlog.get_logger()
 
@@ -22,30 +27,76 @@ class DjangoFileScanner(FileScanner):
     }
 
 
+# Byte strings that must occur in a file for _extract_all to find anything in it
+_CATEGORY_MARKERS: Dict[str, bytes] = {
+    "models": b"Model",
+    "serializers": b"Serializer",
+    "urls": b"urlpatterns",
+}
+
+
+def parse_file_worker(file_path: Path, category: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Read, AST-parse and extract a single file.
+
+    Module-level so it can be shipped to ProcessPoolExecutor workers.
+    """
+    content = file_path.read_bytes()
+    # A file lacking the category's marker cannot yield anything; skip the parse
+    marker = _CATEGORY_MARKERS.get(category)
+    if marker is not None and marker not in content:
+        return {category: []}
+    tree = ast.parse(content, filename=str(file_path))
+    return DjangoAnalyzer._extract_all(tree, {category})
+
+
+def _parse_file_safe(entry: Tuple[Path, str]) -> Tuple[Optional[Dict[str, List[Dict[str, Any]]]], Optional[str]]:
+    """Run parse_file_worker, returning the error instead of raising across processes."""
+    try:
+        return parse_file_worker(*entry), None
+    except Exception as e:
+        return None, str(e)
+
+
 class DjangoAnalyzer(BaseAnalyzer):
     """Analyze a Django project by AST-parsing discovered Django files."""
 
-    def __init__(self, project_path: str):
+    CACHE_PATH = Path(".agent_cache") / "ast.sqlite"
+    # Bump whenever _extract_all changes what it records, invalidating cached results
+    EXTRACT_VERSION = 2
+    # Below this many files, process start-up costs more than it saves
+    PARALLEL_THRESHOLD = 32
+
+    def __init__(self, project_path: str, use_cache: bool = True, max_workers: Optional[int] = None):
         super().__init__(project_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
         self.scanner = DjangoFileScanner(project_path)
         self.models: Dict[str, List[Dict[str, Any]]] = {}
         self.views: Dict[str, List[Dict[str, Any]]] = {}
         self.urls: Dict[str, List[Dict[str, Any]]] = {}
         self.serializers: Dict[str, List[Dict[str, Any]]] = {}
+        # Running totals per kind, maintained by _merge
+        self.counts: Dict[str, int] = {"models": 0, "views": 0, "urls": 0, "serializers": 0}
+        self.cache: Optional[ParseCache] = (
+            self._open_parse_cache(self.CACHE_PATH, self.EXTRACT_VERSION) if use_cache else None
+        )
 
     def analyze(self):
         """Run full analysis."""
         logger.info("Starting Django project analysis...")
         self.scanner.scan()
 
-        for file_path in self.scanner.files["models"]:
-            self._parse_file(file_path, "models")
-        for file_path in self.scanner.files["views"]:
-            self._parse_file(file_path, "views")
-        for file_path in self.scanner.files["urls"]:
-            self._parse_file(file_path, "urls")
-        for file_path in self.scanner.files["serializers"]:
-            self._parse_file(file_path, "serializers")
+        entries = [
+            (file_path, category)
+            for category, files in self.scanner.files.items()
+            for file_path in files
+        ]
+        if self.max_workers > 1 and len(entries) >= self.PARALLEL_THRESHOLD:
+            self._parse_files_parallel(entries)
+        else:
+            for file_path, category in entries:
+                self._parse_file(file_path, category)
+        if self.cache:
+            self.cache.flush()
 
         logger.info("Analysis complete.")
         return {
@@ -55,6 +106,7 @@ class DjangoAnalyzer(BaseAnalyzer):
             "urls": self.urls,
             "serializers": self.serializers,
             "testable_endpoints": self._extract_testable_endpoints(),
+            "counts": dict(self.counts),
         }
 
     def _parse_file(self, file_path: Path, category: str):
@@ -63,76 +115,122 @@ class DjangoAnalyzer(BaseAnalyzer):
         self.apps.add(app_name)
 
         try:
-            content = file_path.read_text(encoding="utf-8")
-            tree = ast.parse(content)
-
-            if category == "models":
-                if app_name not in self.models:
-                    self.models[app_name] = []
-                self.models[app_name].extend(self._extract_models(tree))
-            elif category == "views":
-                if app_name not in self.views:
-                    self.views[app_name] = []
-                self.views[app_name].extend(self._extract_views(tree))
-            elif category == "urls":
-                if app_name not in self.urls:
-                    self.urls[app_name] = []
-                self.urls[app_name].extend(self._extract_urls(tree))
-            elif category == "serializers":
-                if app_name not in self.serializers:
-                    self.serializers[app_name] = []
-                self.serializers[app_name].extend(self._extract_serializers(tree))
+            stat = file_path.stat()
+            extracted = self.cache.get(file_path, stat) if self.cache else None
+            if extracted is None:
+                extracted = parse_file_worker(file_path, category)
+                if self.cache:
+                    self.cache.set(file_path, stat, extracted)
+
+            self._merge(app_name, extracted)
 
         except Exception as e:
             logger.error(f"Failed to parse {file_path}: {e}")
 
-    def _extract_models(self, tree: ast.AST) -> List[Dict[str, Any]]:
-        """Extract model classes."""
-        models = []
-        for node in ast.walk(tree):
+    def _parse_files_parallel(self, entries: List[Tuple[Path, str]]):
+        """Parse cache misses across worker processes and merge in scan order."""
+        results: List[Optional[Dict[str, List[Dict[str, Any]]]]] = []
+        stats: List[Optional[os.stat_result]] = []
+        for file_path, _ in entries:
+            self.apps.add(self._get_app_name(file_path))
+            try:
+                stat = file_path.stat()
+            except OSError as e:
+                logger.error(f"Failed to parse {file_path}: {e}")
+                stat = None
+            stats.append(stat)
+            results.append(self.cache.get(file_path, stat) if self.cache and stat else None)
+
+        misses = [i for i, result in enumerate(results) if result is None and stats[i] is not None]
+        if misses:
+            chunksize = max(1, len(misses) // (self.max_workers * 4))
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                parsed = executor.map(_parse_file_safe, [entries[i] for i in misses], chunksize=chunksize)
+                for i, (extracted, error) in zip(misses, parsed):
+                    file_path = entries[i][0]
+                    if error is not None:
+                        logger.error(f"Failed to parse {file_path}: {error}")
+                        continue
+                    results[i] = extracted
+                    if self.cache:
+                        self.cache.set(file_path, stats[i], extracted)
+
+        for (file_path, _), extracted in zip(entries, results):
+            if extracted is not None:
+                self._merge(self._get_app_name(file_path), extracted)
+
+    def _merge(self, app_name: str, extracted: Dict[str, List[Dict[str, Any]]]):
+        """Append one file's extraction results to the per-app collections."""
+        for kind, items in extracted.items():
+            getattr(self, kind).setdefault(app_name, []).extend(items)
+            self.counts[kind] += len(items)
+
+    @staticmethod
+    def _extract_all(tree: ast.Module, categories: Set[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Extract everything the given categories need from module-level statements.
+
+        Models, serializers and views are top-level definitions and URL routes
+        live in ``urlpatterns``, so function and method bodies are never visited.
+        """
+        found: Dict[str, List[Dict[str, Any]]] = {category: [] for category in categories}
+        models = found.get("models")
+        views = found.get("views")
+        urls = found.get("urls")
+        serializers = found.get("serializers")
+
+        for node in tree.body:
             if isinstance(node, ast.ClassDef):
-                for base in node.bases:
-                    if isinstance(base, ast.Attribute) and base.attr == "Model":
+                if views is not None:
+                    views.append({"name": node.name, "type": "class"})
+                if models is not None or serializers is not None:
+                    is_model = is_serializer = False
+                    for base in node.bases:
+                        if isinstance(base, ast.Attribute):
+                            is_model = is_model or base.attr == "Model"
+                            is_serializer = is_serializer or "Serializer" in base.attr
+                    if is_model and models is not None:
                         models.append({"name": node.name, "fields": []})
-                        break
-        return models
-
-    def _extract_views(self, tree: ast.AST) -> List[Dict[str, Any]]:
-        """Extract view functions or classes."""
-        views = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                views.append({"name": node.name, "type": "function"})
-            elif isinstance(node, ast.ClassDef):
-                views.append({"name": node.name, "type": "class"})
-        return views
-
-    def _extract_urls(self, tree: ast.AST) -> List[Dict[str, Any]]:
-        """Extract url patterns."""
-        urls = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'path':
-                if len(node.args) > 1:
-                    pattern_node = node.args[0]
-                    view_node = node.args[1]
-
-                    pattern = self._get_node_value(pattern_node)
-                    view_name = self._get_node_value(view_node)
-
-                    if pattern and view_name:
-                        urls.append({"pattern": pattern, "view": view_name})
-        return urls
-
-    def _extract_serializers(self, tree: ast.AST) -> List[Dict[str, Any]]:
-        """Extract DRF serializers."""
-        serializers = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                for base in node.bases:
-                    if isinstance(base, ast.Attribute) and "Serializer" in base.attr:
+                    if is_serializer and serializers is not None:
                         serializers.append({"name": node.name, "fields": []})
-                        break
-        return serializers
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if views is not None:
+                    views.append({"name": node.name, "type": "function"})
+            elif urls is not None and isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                if node.value is not None and any(
+                    isinstance(t, ast.Name) and t.id == "urlpatterns" for t in targets
+                ):
+                    DjangoAnalyzer._extract_url_routes(node.value, urls)
+        return found
+
+    @staticmethod
+    def _extract_url_routes(value: ast.expr, urls: List[Dict[str, Any]]):
+        """Collect ``path(...)`` entries from a urlpatterns list (or a sum of lists)."""
+        if isinstance(value, ast.BinOp):
+            DjangoAnalyzer._extract_url_routes(value.left, urls)
+            DjangoAnalyzer._extract_url_routes(value.right, urls)
+            return
+        if not isinstance(value, (ast.List, ast.Tuple)):
+            return
+        for elt in value.elts:
+            if (isinstance(elt, ast.Call) and isinstance(elt.func, ast.Name)
+                    and elt.func.id == 'path' and len(elt.args) > 1):
+                pattern = BaseAnalyzer._get_node_value(elt.args[0])
+                view_name = BaseAnalyzer._get_node_value(elt.args[1])
+                if pattern and view_name:
+                    urls.append({"pattern": pattern, "view": view_name})
+
+    def compact_context(self) -> Dict[str, Any]:
+        """Names per app and URL routes only, instead of the full analysis."""
+        apps: Dict[str, Dict[str, List[str]]] = {}
+        for app_name in sorted(self.apps):
+            entry = {
+                kind: [item["name"] for item in getattr(self, kind).get(app_name, [])]
+                for kind in ("models", "views", "serializers")
+            }
+            entry["urls"] = [f"{url['pattern']} -> {url['view']}" for url in self.urls.get(app_name, [])]
+            apps[app_name] = {kind: names for kind, names in entry.items() if names}
+        return {"apps": apps}
 
     def get_test_plan(self) -> Dict[str, Any]:
         """Generate a test plan from the analysis."""
@@ -1,12 +1,14 @@
 
 """Flask-specific project analyzer."""
 import ast
+import itertools
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 import structlog
 
 from analyzer.base_analyzer import FileScanner, BaseAnalyzer
+from analyzer.parse_cache import ParseCache
 
 logger = structlog.get_logger()
 
@@ -22,10 +24,17 @@ class FlaskFileScanner(FileScanner):
 class FlaskAnalyzer(BaseAnalyzer):
     """Analyze a Flask project."""
 
-    def __init__(self, project_path: str):
+    CACHE_PATH = Path(".agent_cache") / "flask_ast.sqlite"
+    # Bump whenever _extract_routes changes what it records
+    EXTRACT_VERSION = 2
+
+    def __init__(self, project_path: str, use_cache: bool = True):
         super().__init__(project_path)
         self.scanner = FlaskFileScanner(project_path)
         self.routes: List[Dict[str, Any]] = []
+        self.cache: Optional[ParseCache] = (
+            self._open_parse_cache(self.CACHE_PATH, self.EXTRACT_VERSION) if use_cache else None
+        )
 
     def analyze(self):
         """Run full analysis."""
@@ -34,6 +43,8 @@ class FlaskAnalyzer(BaseAnalyzer):
 
         for file_path in self.scanner.files["app"]:
             self._parse_file(file_path, "app")
+        if self.cache:
+            self.cache.flush()
 
         logger.info("Analysis complete.")
         return {"routes": self.routes}
@@ -41,26 +52,41 @@ class FlaskAnalyzer(BaseAnalyzer):
     def _parse_file(self, file_path: Path, category: str):
         """Read and AST-parse a single file."""
         try:
-            content = file_path.read_text(encoding="utf-8")
-            tree = ast.parse(content)
-            self.routes.extend(self._extract_routes(tree))
+            stat = file_path.stat()
+            routes = self.cache.get(file_path, stat) if self.cache else None
+            if routes is None:
+                tree = ast.parse(file_path.read_bytes(), filename=str(file_path))
+                routes = self._extract_routes(tree)
+                if self.cache:
+                    self.cache.set(file_path, stat, routes)
+            self.routes.extend(routes)
         except Exception as e:
             logger.error(f"Failed to parse {file_path}: {e}")
 
-    def _extract_routes(self, tree: ast.AST) -> List[Dict[str, Any]]:
-        """Extract routes from @app.route decorators."""
+    def _extract_routes(self, tree: ast.Module) -> List[Dict[str, Any]]:
+        """Extract routes from @app.route decorators.
+
+        Only statement bodies are traversed: routes may be declared inside an
+        application factory or a conditional block, but never inside an
+        expression, so expression subtrees are skipped entirely.
+        """
         routes = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
+        stack = [iter(tree.body)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 for decorator in node.decorator_list:
                     if (isinstance(decorator, ast.Call) and
                             isinstance(decorator.func, ast.Attribute) and
                             decorator.func.attr == 'route'):
-                        
+
                         methods = ["GET"]  # Default method
                         if decorator.args:
                             route_path = self._get_node_value(decorator.args[0])
-                            
+
                             # Extract methods from keyword arguments
                             for keyword in decorator.keywords:
                                 if keyword.arg == "methods":
@@ -71,8 +97,23 @@ class FlaskAnalyzer(BaseAnalyzer):
                                 "function": node.name,
                                 "methods": methods
                             })
+            # Descend in source order: body, except handlers / match cases, else, finally
+            blocks = [getattr(node, "body", None)]
+            blocks.extend(child.body for child in getattr(node, "handlers", ()))
+            blocks.extend(case.body for case in getattr(node, "cases", ()))
+            blocks.extend(getattr(node, field, None) for field in ("orelse", "finalbody"))
+            stack.append(itertools.chain.from_iterable(b for b in blocks if isinstance(b, list)))
         return routes
 
+    def compact_context(self) -> Dict[str, Any]:
+        """Routes as "METHODS path -> function" lines, instead of the full analysis."""
+        return {
+            "routes": [
+                f"{','.join(route['methods'])} {route['path']} -> {route['function']}"
+                for route in self.routes
+            ]
+        }
+
     def get_test_plan(self) -> Dict[str, Any]:
         """Generate a test plan from the analysis."""
         return {
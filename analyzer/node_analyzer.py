@@ -1,17 +1,37 @@
 
 """Node.js-specific project analyzer."""
-import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import json
 import re
 
 import structlog
 
 from analyzer.base_analyzer import FileScanner, BaseAnalyzer
+from analyzer.parse_cache import ParseCache
+
+try:
+    import orjson
+
+    def _load_json(raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+except ImportError:  # orjson is optional
+
+    def _load_json(raw: bytes) -> Any:
+        return json.loads(raw)
 
 logger = structlog.get_logger()
 
+# app.get('/path', handler) or router.post("/path", ...). Character classes
+# instead of lazy quantifiers keep matching linear; the comma requirement
+# excludes settings lookups such as app.get('env').
+ROUTE_RE = re.compile(
+    rb"(?:app|router)\.(get|post|put|delete|patch|all)\s*\(\s*[`'\"]([^`'\"\n]+)[`'\"]\s*,"
+)
+
 
 class NodeFileScanner(FileScanner):
     """Locate Node.js-related files."""
@@ -22,14 +42,40 @@ class NodeFileScanner(FileScanner):
     }
 
 
+def parse_file_worker(file_path: Path) -> List[Dict[str, Any]]:
+    """Read a single JS file and extract its routes.
+
+    Module-level so it can be shipped to ProcessPoolExecutor workers.
+    """
+    return NodeAnalyzer._extract_routes(file_path.read_bytes())
+
+
+def _parse_file_safe(file_path: Path) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """Run parse_file_worker, returning the error instead of raising across processes."""
+    try:
+        return parse_file_worker(file_path), None
+    except Exception as e:
+        return None, str(e)
+
+
 class NodeAnalyzer(BaseAnalyzer):
     """Analyze a Node.js project."""
 
-    def __init__(self, project_path: str):
+    CACHE_PATH = Path(".agent_cache") / "node_routes.sqlite"
+    # Bump whenever _extract_routes changes what it records
+    EXTRACT_VERSION = 1
+    # Below this many files, process start-up costs more than it saves
+    PARALLEL_THRESHOLD = 64
+
+    def __init__(self, project_path: str, use_cache: bool = True, max_workers: Optional[int] = None):
         super().__init__(project_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
         self.scanner = NodeFileScanner(project_path)
         self.routes: list[dict[str, Any]] = []
         self.app_file: str = "app.js"
+        self.cache: Optional[ParseCache] = (
+            self._open_parse_cache(self.CACHE_PATH, self.EXTRACT_VERSION) if use_cache else None
+        )
 
     def analyze(self) -> Dict[str, Any]:
         """Run full analysis."""
@@ -39,19 +85,37 @@ class NodeAnalyzer(BaseAnalyzer):
         try:
             package_json_path = self.root / "package.json"
             if package_json_path.exists():
-                with open(package_json_path, "r") as f:
-                    package_data = json.load(f)
-                    self.app_file = package_data.get("main", self.app_file)
+                package_data = _load_json(package_json_path.read_bytes())
+                self.app_file = package_data.get("main", self.app_file)
         except Exception as e:
             logger.warning(f"Could not read package.json: {e}")
 
-        self.scanner.scan()
-
-        all_js_files = list(self.root.rglob("*.js"))
-        for file_path in all_js_files:
-            if "node_modules" in file_path.parts:
+        # One walk of the tree; it already prunes node_modules and other SKIP_DIRS
+        js_files: List[Path] = []
+        stats: List[os.stat_result] = []
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        for entry in self.scanner.walk():
+            if not entry.name.endswith(".js"):
                 continue
-            self._parse_file(file_path)
+            file_path = Path(entry.path)
+            try:
+                stat = entry.stat()
+            except OSError as e:
+                logger.error(f"Failed to parse {file_path}: {e}")
+                continue
+            js_files.append(file_path)
+            stats.append(stat)
+            results.append(self.cache.get(file_path, stat) if self.cache else None)
+
+        misses = [i for i, routes in enumerate(results) if routes is None]
+        if misses:
+            self._parse_misses(js_files, stats, results, misses)
+        if self.cache:
+            self.cache.flush()
+
+        for routes in results:
+            if routes is not None:
+                self.routes.extend(routes)
 
         logger.info("Node.js analysis complete.")
         return {
@@ -59,40 +123,55 @@ class NodeAnalyzer(BaseAnalyzer):
             "app_file": self.app_file,
         }
 
-    def _parse_file(self, file_path: Path):
-        """Read and parse a single JS file for routes."""
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            self.routes.extend(self._extract_routes(content))
-        except Exception as e:
-            logger.error(f"Failed to parse {file_path}: {e}")
+    def _parse_misses(
+        self,
+        js_files: List[Path],
+        stats: List[os.stat_result],
+        results: List[Optional[List[Dict[str, Any]]]],
+        misses: List[int],
+    ):
+        """Extract routes for cache misses, across worker processes on larger projects."""
+        miss_files = [js_files[i] for i in misses]
+        if self.max_workers > 1 and len(misses) >= self.PARALLEL_THRESHOLD:
+            chunksize = max(1, len(misses) // (self.max_workers * 4))
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                self._store_parsed(
+                    executor.map(_parse_file_safe, miss_files, chunksize=chunksize),
+                    js_files, stats, results, misses,
+                )
+        else:
+            self._store_parsed(map(_parse_file_safe, miss_files), js_files, stats, results, misses)
+
+    def _store_parsed(self, parsed, js_files, stats, results, misses):
+        """Record parse results in walk order and in the cache, logging failures."""
+        for i, (routes, error) in zip(misses, parsed):
+            if error is not None:
+                logger.error(f"Failed to parse {js_files[i]}: {error}")
+                continue
+            results[i] = routes
+            if self.cache:
+                self.cache.set(js_files[i], stats[i], routes)
 
-    def _extract_routes(self, content: str) -> List[Dict[str, Any]]:
-        """Extract routes from JS code using regex."""
+    @staticmethod
+    def _extract_routes(content: bytes) -> List[Dict[str, Any]]:
+        """Extract routes from JS source using regex."""
         routes = []
-        
-        # Regex for app.get('/path', handler) or router.post('/path', handler)
-        route_pattern = re.compile(
-            r"""
-            (?:app|router)\.
-            (get|post|put|delete|patch|all) # HTTP method
-            \s*\(\s*
-            [`'"](.+?)['"`] # Route path
-            \s*,\s*
-            .* # Ignore middleware and handler
-            \)
-            """, re.VERBOSE)
-
-        for match in route_pattern.finditer(content):
+        for match in ROUTE_RE.finditer(content):
             method, path = match.groups()
             routes.append({
-                "path": path,
-                "methods": [method.upper()],
+                "path": path.decode("utf-8", errors="replace"),
+                "methods": [method.decode().upper()],
                 "handler": "unknown",
             })
-            
         return routes
 
+    def compact_context(self) -> Dict[str, Any]:
+        """Routes as "METHODS path" lines plus the app file, instead of the full analysis."""
+        return {
+            "app_file": self.app_file,
+            "routes": [f"{','.join(route['methods'])} {route['path']}" for route in self.routes],
+        }
+
     def get_test_plan(self) -> Dict[str, Any]:
         """Generate a test plan from the analysis."""
         return {
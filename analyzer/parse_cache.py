@@ -0,0 +1,55 @@
+"""On-disk cache of per-file analysis results."""
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class ParseCache:
+    """SQLite store of extraction results keyed by file path, mtime and size.
+
+    A hit means the file is unchanged since it was last analyzed, so it does
+    not need to be read or AST-parsed again. ``version`` identifies the shape
+    of the stored results; opening the store with a different version drops
+    every entry.
+    """
+
+    def __init__(self, db_path: Path, version: int = 0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, result TEXT)"
+        )
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != version:
+            self._conn.execute("DELETE FROM parsed")
+            self._conn.execute(f"PRAGMA user_version = {int(version)}")
+            self._conn.commit()
+
+    def get(self, file_path: Path, stat: os.stat_result) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, result FROM parsed WHERE path = ?", (str(file_path),)
+        ).fetchone()
+        if row is None or row[0] != stat.st_mtime_ns or row[1] != stat.st_size:
+            return None
+        return json.loads(row[2])
+
+    def set(self, file_path: Path, stat: os.stat_result, result: Any):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO parsed (path, mtime_ns, size, result) VALUES (?, ?, ?, ?)",
+            (str(file_path), stat.st_mtime_ns, stat.st_size, json.dumps(result)),
+        )
+
+    def flush(self):
+        """Commit pending writes."""
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -1,51 +1,194 @@
 import os
+import re
 import json
-import time
 import asyncio
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import shutil
+import tempfile
+from typing import Iterator, List, Dict, Any, Optional
 
 import click
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.prompt import Confirm, Prompt
-from rich.syntax import Syntax
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from agent.llm_client import GeminiClient
-from analyzer.django_analyzer import DjangoAnalyzer
-from analyzer.flask_analyzer import FlaskAnalyzer
-from analyzer.node_analyzer import NodeAnalyzer
-from runner.test_runner import run_test_interactive, TestResult
+# Analyzers, the LLM client and the runner are imported inside the commands that
+# use them, so lightweight commands such as `version` start quickly
+from analyzer.base_analyzer import FileScanner
+
+try:
+    import orjson
+
+    def _dumps_context(obj: Any) -> str:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+except ImportError:  # orjson is optional
+
+    def _dumps_context(obj: Any) -> str:
+        return json.dumps(obj, default=str, separators=(",", ":"))
 
 load_dotenv()
 console = Console()
 
+# Flask detection reads at most this many .py files, this deep, this many bytes each
+DETECT_MAX_DEPTH = 2
+DETECT_MAX_FILES = 200
+DETECT_READ_BYTES = 4096
+FLASK_IMPORT_RE = re.compile(rb"^[ \t]*(?:from[ \t]+flask\b|import[ \t]+flask\b)", re.MULTILINE)
+
+
+def _iter_detection_candidates(root: str) -> Iterator[str]:
+    """Yield .py files near the project root, shallowest first."""
+    level = [root]
+    found = 0
+    for _ in range(DETECT_MAX_DEPTH + 1):
+        next_level = []
+        for directory in level:
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in FileScanner.SKIP_DIRS:
+                        next_level.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    yield entry.path
+                    found += 1
+                    if found >= DETECT_MAX_FILES:
+                        return
+        level = next_level
+
+
 def detect_project_type(path: str) -> str:
     """Detect the project type (django, flask, node)."""
-    project_path = Path(path)
-    
     # Check for Django
-    if (project_path / "manage.py").exists():
+    if os.path.isfile(os.path.join(path, "manage.py")):
         return "django"
     
     # Check for Node.js
-    if (project_path / "package.json").exists():
+    if os.path.isfile(os.path.join(path, "package.json")):
         return "node"
     
-    # Check for Flask
-    for py_file in project_path.rglob("*.py"):
+    # Check for Flask; imports sit at the top of a module, so only the head is read
+    for py_file in _iter_detection_candidates(path):
         try:
-            with open(py_file, "r", encoding="utf-8") as f:
-                content = f.read()
-                if "from flask import Flask" in content or "import flask" in content:
-                    return "flask"
-        except Exception:
+            with open(py_file, "rb") as f:
+                head = f.read(DETECT_READ_BYTES)
+        except OSError:
             continue
+        if FLASK_IMPORT_RE.search(head):
+            return "flask"
             
     return "unknown"
 
+def _create_analyzer(project_type: str, path: str):
+    """Instantiate the analyzer for a detected project type, or None."""
+    if project_type == "django":
+        from analyzer.django_analyzer import DjangoAnalyzer
+        return DjangoAnalyzer(path)
+    if project_type == "flask":
+        from analyzer.flask_analyzer import FlaskAnalyzer
+        return FlaskAnalyzer(path)
+    if project_type == "node":
+        from analyzer.node_analyzer import NodeAnalyzer
+        return NodeAnalyzer(path)
+    return None
+
+
+def _create_client(api_key: str, llm_cache: bool = False):
+    """Create the LLM client; ``llm_cache`` forces the on-disk response cache on.
+
+    Without the flag the client still honours ``LLM_CACHE=1``.
+    """
+    from agent.cache import ResponseCache
+    from agent.llm_client import GeminiClient
+
+    return GeminiClient(api_key, cache=ResponseCache() if llm_cache else None)
+
+
+def build_prompt(
+    spec: str,
+    project_type: str,
+    analysis_results: Dict[str, Any],
+    context_json: Optional[str] = None,
+) -> str:
+    """Fill the API-test template for a project type; empty if the type is unsupported.
+
+    Pass ``context_json`` to reuse an already serialized analysis across calls.
+    """
+    from agent.prompts import PromptTemplates
+
+    if context_json is None:
+        context_json = _dumps_context(analysis_results)
+
+    if project_type == "django":
+        return PromptTemplates.render(
+            PromptTemplates.GENERATE_API_TEST_DJANGO,
+            specification=spec, url_pattern="/api/items/", view_name="ItemListView",
+            methods="['GET', 'POST']", parameters="{}", view_code="class ItemListView(APIView): ...",
+            model_info='{"name": "Item", "fields": ["name", "value"]}',
+            codebase_context=context_json
+        )
+    route_info = analysis_results.get("routes", [{}])[0] if analysis_results.get("routes") else {}
+    if project_type == "flask":
+        return PromptTemplates.render(
+            PromptTemplates.GENERATE_API_TEST_FLASK,
+            specification=spec, path=route_info.get("path", "/"),
+            function=route_info.get("function", "unknown"), methods=str(route_info.get("methods", ["GET"])),
+            app_context=context_json
+        )
+    if project_type == "node":
+        return PromptTemplates.render(
+            PromptTemplates.GENERATE_API_TEST_NODE,
+            specification=spec, path=route_info.get("path", "/"),
+            handler=route_info.get("handler", "unknown"), methods=str(route_info.get("methods", ["GET"])),
+            app_context=context_json, app_file=analysis_results.get("app_file", "app.js")
+        )
+    return ""
+
+
+async def batch_generate(
+    client,
+    specs: List[str],
+    project_type: str,
+    analysis_results: Dict[str, Any],
+    concurrency: int = 4,
+    context: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    """Generate tests for several specifications concurrently.
+
+    ``context`` is the prompt-facing projection of the analysis (see
+    ``compact_context``); the full analysis results are used when omitted.
+    Returns one entry per spec, in order: the generated code, or the
+    exception raised for that spec.
+    """
+    context_json = _dumps_context(analysis_results if context is None else context)
+    prompts = [build_prompt(spec, project_type, analysis_results, context_json) for spec in specs]
+    # Only the specification is embedded by the semantic cache, not the templated prompt
+    items = [(prompt, {"specification": spec}) for spec, prompt in zip(specs, prompts) if prompt]
+    generated = iter(await client.generate_many(items, concurrency=concurrency) if items else [])
+    # An empty prompt is never sent to the model; its spec gets an error in its place
+    return [
+        next(generated) if prompt else ValueError("Could not generate prompt for this project type.")
+        for prompt in prompts
+    ]
+
+
+# Clones go to RAM-backed /dev/shm when it has at least this much free space
+CLONE_SHM_MIN_FREE = 1 << 30
+
+
+def _clone_parent_dir() -> Optional[str]:
+    """Return /dev/shm when it exists and has room, else None (the default temp dir)."""
+    try:
+        if shutil.disk_usage("/dev/shm").free >= CLONE_SHM_MIN_FREE:
+            return "/dev/shm"
+    except OSError:
+        pass
+    return None
+
+
 @click.group()
 def cli():
     """Test Authoring Agent - Generate tests from natural language"""
@@ -55,7 +198,8 @@ def cli():
 @cli.command()
 @click.option("--path", "-p", default=".", help="Path to project")
 @click.option("--repo", "-r", help="GitHub repository URL")
-def analyze(path: str, repo: str | None):
+@click.option("--llm-cache", is_flag=True, help="Reuse cached LLM responses for repeated prompts")
+def analyze(path: str, repo: str | None, llm_cache: bool):
     """Analyze a project and show testable components"""
     console.print("[bold blue]🔍 Test Authoring Agent[/bold blue]")
 
@@ -65,17 +209,28 @@ def analyze(path: str, repo: str | None):
     
     # --- Git clone support when --repo is provided ---
     if repo:
+        # GitPython probes for the git binary at import time, so only --repo pays for it
         from git import Repo
-        import tempfile, shutil
 
-        tmp_dir = tempfile.mkdtemp(prefix="test_agent_clone_")
-        console.print(f"[yellow]Cloning {repo} into {tmp_dir}...[/yellow]")
-        try:
-            Repo.clone_from(repo, tmp_dir, depth=1)
-            path = tmp_dir
-        except Exception as clone_err:
-            console.print(f"[red]Failed to clone repository: {clone_err}[/red]")
-            return
+        # The clone lives only as long as the command and is removed afterwards
+        with tempfile.TemporaryDirectory(prefix="test_agent_clone_", dir=_clone_parent_dir()) as tmp_dir:
+            console.print(f"[yellow]Cloning {repo} into {tmp_dir}...[/yellow]")
+            try:
+                # Only the default branch's latest tree is analyzed: no history, other branches or tags
+                Repo.clone_from(repo, tmp_dir, multi_options=["--depth=1", "--single-branch", "--no-tags"])
+            except Exception as clone_err:
+                console.print(f"[red]Failed to clone repository: {clone_err}[/red]")
+                return
+            _analyze_project(tmp_dir, llm_cache)
+        return
+
+    _analyze_project(path, llm_cache)
+
+
+def _analyze_project(path: str, llm_cache: bool):
+    """Analyze a local project, show the summary and optionally start a session."""
+    from rich.table import Table
+    from rich.progress import Progress, SpinnerColumn, TextColumn
 
     project_type = detect_project_type(path)
     
@@ -86,14 +241,7 @@ def analyze(path: str, repo: str | None):
     console.print(f"Detected [bold green]{project_type.capitalize()}[/bold green] project.")
     console.print("[dim]Analyzing project structure...[/dim]\n")
 
-    analyzer = None
-    if project_type == "django":
-        analyzer = DjangoAnalyzer(path)
-    elif project_type == "flask":
-        analyzer = FlaskAnalyzer(path)
-    elif project_type == "node":
-        analyzer = NodeAnalyzer(path)
-
+    analyzer = _create_analyzer(project_type, path)
     if not analyzer:
         console.print("[red]Failed to initialize analyzer.[/red]")
         return
@@ -117,9 +265,10 @@ def analyze(path: str, repo: str | None):
     
     if project_type == "django":
         table.add_row("Apps", str(len(results.get("apps", []))))
-        table.add_row("Model files", str(sum(len(v) for v in results.get("models", {}).values())))
-        table.add_row("View files", str(sum(len(v) for v in results.get("views", {}).values())))
-        table.add_row("URL files", str(sum(len(v) for v in results.get("urls", {}).values())))
+        counts = results.get("counts", {})
+        table.add_row("Model files", str(counts.get("models", 0)))
+        table.add_row("View files", str(counts.get("views", 0)))
+        table.add_row("URL files", str(counts.get("urls", 0)))
     elif project_type == "flask":
         table.add_row("Routes", str(len(results.get("routes", []))))
     elif project_type == "node":
@@ -156,13 +305,42 @@ def analyze(path: str, repo: str | None):
 
         console.print(ep_table)
 
-    cache = {"path": path, "results": results, "type": project_type}
+    cache = {
+        "path": path, "results": results, "type": project_type,
+        "context": analyzer.compact_context(), "llm_cache": llm_cache,
+    }
     console.print()
     if Confirm.ask("Would you like to generate tests?"):
         asyncio.run(_interactive_session(cache))
 
 
+SESSION_HELP = (
+    "[bold]Commands[/bold]\n"
+    "  <specification>         generate one test\n"
+    "  :batch <spec>; <spec>   generate several tests concurrently\n"
+    "  list                    show the tests generated so far\n"
+    "  help                    show this message\n"
+    "  exit | quit | q         end the session"
+)
+# Session command generating several tests at once, and its maximum LLM requests in flight
+SESSION_BATCH_COMMAND = ":batch"
+SESSION_BATCH_CONCURRENCY = 10
+
+
+def _render_code(code: str, lang: str):
+    """Highlight code once into segments that can be printed repeatedly.
+
+    A Syntax object re-runs Pygments every time it is printed.
+    """
+    from rich.segment import Segments
+    from rich.syntax import Syntax
+
+    return Segments(console.render(Syntax(code, lang)))
+
+
 async def _interactive_session(cache):
+    from runner.test_runner import run_test_interactive
+
     console.print("\n[bold green]🧪 Interactive Test Generation Session[/bold green]")
     analysis_results = cache["results"]
     project_path = cache["path"]
@@ -173,54 +351,64 @@ async def _interactive_session(cache):
         console.print("[red]Error: GEMINI_API_KEY not found in environment[/red]")
         return
 
-    client = GeminiClient(api_key)
-    generated_tests: List[Dict[str, str]] = []
+    client = _create_client(api_key, cache.get("llm_cache", False))
+    # Each entry keeps its rendered segments so `list` does not re-lex the code
+    generated_tests: List[Dict[str, Any]] = []
+    lang = "python" if project_type != "node" else "javascript"
 
-    from rich.syntax import Syntax
-    from agent.prompts import PromptTemplates
+    # The analysis does not change during the session, so serialize its compact
+    # projection once instead of dumping the full results into every prompt
+    context_json = _dumps_context(cache.get("context", analysis_results))
 
     while True:
         spec = Prompt.ask("\n[cyan]Enter test specification[/cyan] ([dim]'help' for commands, 'exit' to quit)[/dim]")
         cmd = spec.lower().strip()
         if cmd in {"quit", "exit", "q"}:
             break
+        if cmd == "help":
+            console.print(SESSION_HELP)
+            continue
+        if cmd == "list":
+            if not generated_tests:
+                console.print("[dim]No tests generated yet.[/dim]")
+            for i, test in enumerate(generated_tests, 1):
+                console.print(f"\n[bold cyan]{i}. {test['spec']}[/bold cyan]")
+                console.print(test["rendered"])
+            continue
+        # The colon keeps the command from swallowing a specification that starts with "batch"
+        if cmd.startswith(SESSION_BATCH_COMMAND):
+            specs = [s.strip() for s in spec.strip()[len(SESSION_BATCH_COMMAND):].split(";") if s.strip()]
+            if not specs:
+                console.print(f"[dim]Usage: {SESSION_BATCH_COMMAND} <spec>; <spec>[/dim]")
+                continue
+            console.print(f"[yellow]🤖 Generating {len(specs)} tests...[/yellow]")
+            results = await batch_generate(
+                client, specs, project_type, analysis_results, SESSION_BATCH_CONCURRENCY,
+                context=cache.get("context", analysis_results),
+            )
+            for batch_spec, test_code in zip(specs, results):
+                console.print(f"\n[bold cyan]{batch_spec}[/bold cyan]")
+                if isinstance(test_code, BaseException):
+                    console.print(f"[red]❌ Generation failed: {test_code}[/red]")
+                    continue
+                rendered = _render_code(test_code, lang)
+                generated_tests.append({"code": test_code, "spec": batch_spec, "rendered": rendered})
+                console.print(rendered)
+            continue
 
         console.print("[yellow]🤖 Generating test...[/yellow]")
         
-        prompt = ""
-        if project_type == "django":
-            prompt = PromptTemplates.GENERATE_API_TEST_DJANGO.format(
-                specification=spec, url_pattern="/api/items/", view_name="ItemListView",
-                methods="['GET', 'POST']", parameters="{}", view_code="class ItemListView(APIView): ...",
-                model_info='{"name": "Item", "fields": ["name", "value"]}',
-                codebase_context=json.dumps(analysis_results, indent=2, default=str)
-            )
-        elif project_type == "flask":
-            route_info = analysis_results.get("routes", [{}])[0] if analysis_results.get("routes") else {}
-            prompt = PromptTemplates.GENERATE_API_TEST_FLASK.format(
-                specification=spec, path=route_info.get("path", "/"),
-                function=route_info.get("function", "unknown"), methods=str(route_info.get("methods", ["GET"])),
-                app_context=json.dumps(analysis_results, indent=2, default=str)
-            )
-        elif project_type == "node":
-            route_info = analysis_results.get("routes", [{}])[0] if analysis_results.get("routes") else {}
-            app_file = analysis_results.get("app_file", "app.js")
-            prompt = PromptTemplates.GENERATE_API_TEST_NODE.format(
-                specification=spec, path=route_info.get("path", "/"),
-                handler=route_info.get("handler", "unknown"), methods=str(route_info.get("methods", ["GET"])),
-                app_context=json.dumps(analysis_results, indent=2, default=str), app_file=app_file
-            )
-
+        prompt = build_prompt(spec, project_type, analysis_results, context_json)
         if not prompt:
             console.print("[red]Could not generate prompt for this project type.[/red]")
             continue
 
-        test_code = await client.generate(prompt, {{}})
-        generated_tests.append({"code": test_code, "spec": spec})
+        test_code = await client.generate(prompt, {"specification": spec})
+        rendered = _render_code(test_code, lang)
+        generated_tests.append({"code": test_code, "spec": spec, "rendered": rendered})
 
         console.print("\n[bold green]✅ Generated Test:[/bold green]")
-        lang = "python" if project_type != "node" else "javascript"
-        console.print(Syntax(test_code, lang))
+        console.print(rendered)
 
         if Confirm.ask("\nRun this test?", default=True):
             test_name = "_".join(spec.lower().split()[:3])
@@ -231,6 +419,52 @@ async def _interactive_session(cache):
                 test_name=test_name
             )
 
+@cli.command()
+@click.option("--path", "-p", default=".", help="Path to project")
+@click.option("--specs", "-s", "specs_file", type=click.File("r"), default="-",
+              help="File with one test specification per line (default: stdin)")
+@click.option("--concurrency", "-c", default=4, show_default=True, help="Maximum LLM requests in flight")
+@click.option("--llm-cache", is_flag=True, help="Reuse cached LLM responses for repeated prompts")
+def batch(path: str, specs_file, concurrency: int, llm_cache: bool):
+    """Generate tests for many specifications at once"""
+    from rich.syntax import Syntax
+
+    specs = [line.strip() for line in specs_file if line.strip()]
+    if not specs:
+        console.print("[red]No specifications given.[/red]")
+        return
+
+    project_type = detect_project_type(path)
+    analyzer = _create_analyzer(project_type, path)
+    if not analyzer:
+        console.print("[red]Could not determine project type.[/red]")
+        return
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        console.print("[red]Error: GEMINI_API_KEY not found in environment[/red]")
+        return
+
+    results = analyzer.analyze()
+    if not results or "error" in results:
+        console.print(f"[red]❌ {results.get('error', 'Analysis failed.')}[/red]")
+        return
+
+    client = _create_client(api_key, llm_cache)
+    console.print(f"[yellow]🤖 Generating {len(specs)} tests...[/yellow]")
+    generated = asyncio.run(batch_generate(
+        client, specs, project_type, results, concurrency, context=analyzer.compact_context()
+    ))
+
+    lang = "python" if project_type != "node" else "javascript"
+    for spec, test_code in zip(specs, generated):
+        console.print(f"\n[bold cyan]{spec}[/bold cyan]")
+        if isinstance(test_code, BaseException):
+            console.print(f"[red]❌ Generation failed: {test_code}[/red]")
+        else:
+            console.print(Syntax(test_code, lang))
+
+
 @cli.command()
 def version():
     """Show version information"""
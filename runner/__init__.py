@@ -3,31 +3,39 @@ Test Agent Runner - A robust test execution environment with sandboxing and erro
 
 This package provides a safe and isolated environment for running Python tests,
 with features like Docker sandboxing, error analysis, and rich output formatting.
+
+Submodules are imported on first attribute access (PEP 562), so importing the
+package does not pull in the Docker SDK until a sandbox is actually used.
 """
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY = {
+    'DockerSandbox': '.sandbox',
+    'SandboxConfig': '.sandbox',
+    'SandboxResult': '.sandbox',
+    'TestErrorAnalyzer': '.error_analyzer',
+    'ErrorAnalysis': '.error_analyzer',
+    'BaseTestRunner': '.test_runner',
+    'DjangoTestRunner': '.test_runner',
+    'PytestTestRunner': '.test_runner',
+    'NodeTestRunner': '.test_runner',
+    'TestResult': '.test_runner',
+    'run_test_interactive': '.test_runner',
+}
 
-from .sandbox import DockerSandbox, SandboxConfig, SandboxResult
-from .error_analyzer import TestErrorAnalyzer, ErrorAnalysis
-from .test_runner import (
-    BaseTestRunner,
-    DjangoTestRunner,
-    PytestTestRunner,
-    NodeTestRunner,
-    TestResult,
-    run_test_interactive,
-)
-
-__all__ = [
-    'DockerSandbox',
-    'SandboxConfig',
-    'SandboxResult',
-    'TestErrorAnalyzer',
-    'ErrorAnalysis',
-    'BaseTestRunner',
-    'DjangoTestRunner',
-    'PytestTestRunner',
-    'NodeTestRunner',
-    'TestResult',
-    'run_test_interactive',
-]
+__all__ = list(_LAZY)
 
 __version__ = '0.1.0'
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,9 +1,41 @@
 import re
+import functools
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Pattern
 import difflib
 import ast
-import astunparse
+
+try:
+    from rapidfuzz import fuzz, process
+
+    def _close_matches(word: str, candidates: List[str], n: int = 3, cutoff: float = 0.6) -> List[str]:
+        """Best matches for word scoring at least cutoff, using rapidfuzz's C++ scorer"""
+        return [
+            match for match, _, _ in
+            process.extract(word, candidates, scorer=fuzz.ratio, limit=n, score_cutoff=cutoff * 100)
+        ]
+
+except ImportError:  # rapidfuzz is optional
+
+    def _close_matches(word: str, candidates: List[str], n: int = 3, cutoff: float = 0.6) -> List[str]:
+        return difflib.get_close_matches(word, candidates, n=n, cutoff=cutoff)
+
+
+@functools.lru_cache(maxsize=128)
+def _code_attributes(test_code: str) -> Tuple[str, ...]:
+    """Distinct attribute names accessed in test_code, in first-seen order.
+
+    Cached per source text, so repeated failures of the same test skip both
+    the parse and the walk.
+    """
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return ()
+    return tuple(dict.fromkeys(node.attr for node in ast.walk(tree) if isinstance(node, ast.Attribute)))
+
+_MISSING_MODULE_RE = re.compile(r"No module named ['\"]([^'\"]+)['\"]")
+_MISSING_ATTRIBUTE_RE = re.compile(r"'(\w+)' object has no attribute '(\w+)'")
 
 @dataclass
 class ErrorAnalysis:
@@ -18,33 +50,49 @@ class ErrorAnalysis:
 class TestErrorAnalyzer:
     """Analyze test failures and suggest fixes"""
     
-    # Common error patterns
-    ERROR_PATTERNS = {
-        'import_error': r"(ImportError|ModuleNotFoundError): (.*)",
-        'assertion_error': r"AssertionError: (.*)",
-        'attribute_error': r"AttributeError: (.*)",
-        'type_error': r"TypeError: (.*)",
-        'value_error': r"ValueError: (.*)",
-        'key_error': r"KeyError: (.*)",
-        'does_not_exist': r"DoesNotExist: (.*)",
-        'validation_error': r"ValidationError: (.*)",
-        'template_error': r"TemplateSyntaxError: (.*)",
-        'database_error': r"(IntegrityError|DatabaseError|OperationalError): (.*)",
+    # Common error patterns, compiled once; searched in this order
+    ERROR_PATTERNS: Dict[str, Pattern[str]] = {
+        'import_error': re.compile(r"(ImportError|ModuleNotFoundError): (.*)", re.DOTALL),
+        'assertion_error': re.compile(r"AssertionError: (.*)", re.DOTALL),
+        'attribute_error': re.compile(r"AttributeError: (.*)", re.DOTALL),
+        'type_error': re.compile(r"TypeError: (.*)", re.DOTALL),
+        'value_error': re.compile(r"ValueError: (.*)", re.DOTALL),
+        'key_error': re.compile(r"KeyError: (.*)", re.DOTALL),
+        'does_not_exist': re.compile(r"DoesNotExist: (.*)", re.DOTALL),
+        'validation_error': re.compile(r"ValidationError: (.*)", re.DOTALL),
+        'template_error': re.compile(r"TemplateSyntaxError: (.*)", re.DOTALL),
+        'database_error': re.compile(r"(IntegrityError|DatabaseError|OperationalError): (.*)", re.DOTALL),
     }
+    # Every pattern's "Name: " prefix as one alternation, tagged with its error kind
+    _ERROR_MARKERS: Pattern[str] = re.compile("|".join(
+        f"(?P<{error_type}>{pattern.pattern[:-len('(.*)')]})"
+        for error_type, pattern in ERROR_PATTERNS.items()
+    ))
     
     def __init__(self, test_code: str, error_output: str):
         self.test_code = test_code
         self.error_output = error_output
-        self.error_lines = error_output.split('\n')
-        self.parsed_code = self._parse_test_code()
+
+    @functools.cached_property
+    def parsed_code(self) -> Optional[ast.AST]:
+        """Test code AST, parsed only when a handler inspects the code"""
+        return self._parse_test_code()
     
     def analyze(self) -> ErrorAnalysis:
         """Analyze the error and return analysis"""
-        # First try to match known error patterns
+        # One pass over the output records where each known error kind first occurs
+        first_seen: Dict[str, int] = {}
+        for marker in self._ERROR_MARKERS.finditer(self.error_output):
+            first_seen.setdefault(marker.lastgroup, marker.start())
+
+        # Then handle the highest-priority kind, matching from its first occurrence
         for error_type, pattern in self.ERROR_PATTERNS.items():
-            match = re.search(pattern, self.error_output, re.DOTALL)
-            if match:
-                return getattr(self, f'_handle_{error_type}')(match)
+            if error_type not in first_seen:
+                continue
+            handler = getattr(self, f'_handle_{error_type}', None)
+            if handler is None:
+                break
+            return handler(pattern.search(self.error_output, first_seen[error_type]))
         
         # If no specific pattern matched, try generic analysis
         return self._generic_error_analysis()
@@ -59,7 +107,7 @@ class TestErrorAnalyzer:
     def _handle_import_error(self, match: re.Match) -> ErrorAnalysis:
         """Handle import errors"""
         error_msg = match.group(2)
-        module_match = re.search(r"No module named ['\"]([^'\"]+)['\"]", error_msg)
+        module_match = _MISSING_MODULE_RE.search(error_msg)
         
         if module_match:
             module = module_match.group(1)
@@ -93,7 +141,7 @@ class TestErrorAnalyzer:
     def _handle_attribute_error(self, match: re.Match) -> ErrorAnalysis:
         """Handle attribute errors"""
         error_msg = match.group(1)
-        attr_match = re.search(r"'(\w+)' object has no attribute '(\w+)'", error_msg)
+        attr_match = _MISSING_ATTRIBUTE_RE.search(error_msg)
         
         if attr_match:
             obj_type = attr_match.group(1)
@@ -103,7 +151,7 @@ class TestErrorAnalyzer:
             similar = []
             test_attrs = self._find_attributes_in_code()
             if test_attrs:
-                similar = difflib.get_close_matches(attr, test_attrs, n=3, cutoff=0.6)
+                similar = _close_matches(attr, test_attrs, n=3, cutoff=0.6)
             
             suggestion = f"Check if '{attr}' is the correct attribute name for {obj_type}"
             if similar:
@@ -140,25 +188,24 @@ class TestErrorAnalyzer:
     
     def _find_attributes_in_code(self) -> List[str]:
         """Find all attribute accesses in the test code"""
-        if not self.parsed_code:
-            return []
-            
-        attributes = set()
-        
-        class AttributeVisitor(ast.NodeVisitor):
-            def visit_Attribute(self, node):
-                attributes.add(node.attr)
-                self.generic_visit(node)
-        
-        visitor = AttributeVisitor()
-        visitor.visit(self.parsed_code)
-        return list(attributes)
+        return list(_code_attributes(self.test_code))
     
+    def _last_error_line(self) -> Optional[str]:
+        """Return the last non-blank line not indented by four spaces, scanning from the end"""
+        text = self.error_output
+        end = len(text)
+        while end >= 0:
+            start = text.rfind('\n', 0, end) + 1
+            line = text[start:end]
+            if line.strip() and not line.startswith(' ' * 4):
+                return line
+            end = start - 1
+        return None
+
     def _generic_error_analysis(self) -> ErrorAnalysis:
         """Generic error analysis when no pattern matches"""
         # Try to extract the most relevant error message
-        lines = [line for line in self.error_lines if line.strip() and not line.startswith(' ' * 4)]
-        error_line = lines[-1] if lines else "Unknown error"
+        error_line = self._last_error_line() or "Unknown error"
         
         return ErrorAnalysis(
             error_type="unknown_error",
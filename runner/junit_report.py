@@ -0,0 +1,22 @@
+"""Reading pytest JUnit XML reports, shared by local and sandbox batch runs."""
+from pathlib import Path
+from typing import IO, Dict, List, Union
+from xml.etree import ElementTree
+
+
+def junit_cases_by_module(report: Union[str, Path, IO[bytes]]) -> Dict[str, List[str]]:
+    """Map each test module in a pytest JUnit XML report to its failure messages.
+
+    A module that ran cleanly maps to an empty list.
+    """
+    cases: Dict[str, List[str]] = {}
+    for case in ElementTree.parse(report).iter("testcase"):
+        # classname is the dotted module path, plus the class for class-based tests;
+        # collection errors leave it empty and put the module path in name instead
+        parts = (case.get("classname") or case.get("name", "")).split(".")
+        module = next((part for part in reversed(parts) if part.startswith("test_")), parts[-1])
+        failures = cases.setdefault(module, [])
+        for outcome in case:
+            if outcome.tag in ("failure", "error"):
+                failures.append(f"{case.get('name')}: {outcome.get('message', '')}\n{outcome.text or ''}".rstrip())
+    return cases
@@ -0,0 +1,62 @@
+"""Walking and fingerprinting project trees, shared by the runners and the sandbox.
+
+Kept free of Docker and rich so local runs do not import them.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import FrozenSet, Iterator, Tuple, Union
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Names never copied into sandbox images or fingerprinted; matching directories
+# are not descended into. Includes the runners' own scratch and cache directories.
+PROJECT_EXCLUDE_NAMES = frozenset({
+    '__pycache__', '.git', 'venv', 'env', '.venv', '.test_tmp', '.pytest_cache', '.agent_cache',
+})
+PROJECT_EXCLUDE_SUFFIXES = ('.pyc', '.pyo', '.pyd')
+
+
+def iter_project_files(
+    root: Union[str, Path],
+    exclude_names: FrozenSet[str] = PROJECT_EXCLUDE_NAMES,
+    exclude_suffixes: Tuple[str, ...] = PROJECT_EXCLUDE_SUFFIXES,
+) -> Iterator[str]:
+    """Yield paths of files under root, pruning excluded directories before descent"""
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError as e:
+            logger.warning("failed_to_scan_directory", error=str(e))
+            continue
+        with it:
+            for entry in it:
+                if entry.name in exclude_names:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif not entry.name.endswith(exclude_suffixes):
+                    yield entry.path
+
+
+def project_fingerprint(
+    root: Union[str, Path],
+    exclude_names: FrozenSet[str] = PROJECT_EXCLUDE_NAMES,
+    exclude_suffixes: Tuple[str, ...] = PROJECT_EXCLUDE_SUFFIXES,
+) -> str:
+    """Hash of every project file's relative path, size and mtime.
+
+    Changes whenever a file is added, removed or modified; nothing is read.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    root = str(root)
+    for file_path in sorted(iter_project_files(root, exclude_names, exclude_suffixes)):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.relpath(file_path, root)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
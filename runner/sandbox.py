@@ -1,17 +1,187 @@
 import docker
+import ast
+import atexit
+import asyncio
+import codecs
+import contextlib
+import copy
+import functools
+import os
+import hashlib
 import tempfile
+import threading
+import uuid
 import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple, List
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Any, Iterable, Iterator, Optional, Tuple, List, Union
 import structlog
 import time
 from dataclasses import dataclass
 import tarfile
 import io
 
+from .junit_report import junit_cases_by_module
+from .project_files import (
+    PROJECT_EXCLUDE_NAMES,
+    PROJECT_EXCLUDE_SUFFIXES,
+    iter_project_files,
+    project_fingerprint,
+)
+
 logger = structlog.get_logger()
 
+# Sandbox runs allowed to drive the Docker daemon at once, across all sandboxes;
+# the daemon degrades sharply when many containers are created or exec'd together
+SANDBOX_MAX_PARALLEL = int(os.getenv("SANDBOX_MAX_PARALLEL", "8"))
+# A thread semaphore, because runs execute in worker threads (see run_test_async)
+_docker_slots = threading.BoundedSemaphore(SANDBOX_MAX_PARALLEL)
+# Chunk size for copying file contents into archives; tarfile defaults to 16 KiB
+TAR_COPY_BUFSIZE = 2 * 1024 * 1024
+# Characters of test output kept per run; verbose runs keep their tail
+SANDBOX_OUTPUT_LIMIT = 1024 * 1024
+
+# Project image recipe: the sandbox's test dependencies and the project's own, if it
+# has any, installed by one pip run so they are resolved together. Only the
+# requirement files are copied before pip, so a source edit reuses the cached
+# dependency layer; the requirements.tx[t] glob lets the project go without one.
+_DOCKERFILE = """FROM {image}
+COPY .sandbox-requirements.txt requirements.tx[t] /app/
+RUN set -- -r /app/.sandbox-requirements.txt \\
+    && if [ -f /app/requirements.txt ]; then set -- "$@" -r /app/requirements.txt; fi \\
+    && pip install --no-cache-dir --disable-pip-version-check --no-input --prefer-binary "$@"
+COPY . /app
+"""
+
+# Test dependencies installed into every sandbox image
+SANDBOX_REQUIREMENTS = """django>=3.2,<5.0
+pytest>=7.0.0
+pytest-django>=4.5.0
+factory-boy>=3.2.0
+"""
+
+# Inserted after a test's imports
+_DJANGO_SETUP_TEMPLATE = """
+import os
+import sys
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{settings}')
+
+# Add project to path
+sys.path.insert(0, '/app')
+
+django.setup()
+
+"""
+
+# Environment of test execs: the project copied into /app is importable, and
+# nothing tries to write bytecode to the read-only image
+_EXEC_ENVIRONMENT = {"PYTHONPATH": "/app", "PYTHONDONTWRITEBYTECODE": "1"}
+
+_docker_client_lock = threading.Lock()
+_docker_client: Optional[docker.DockerClient] = None
+
+
+def _get_docker_client() -> docker.DockerClient:
+    """Return the process-wide Docker client, connecting and pinging on first use"""
+    global _docker_client
+    with _docker_client_lock:
+        if _docker_client is None:
+            client = docker.from_env()
+            client.ping()
+            _docker_client = client
+        return _docker_client
+
+
+_sandbox_executor_lock = threading.Lock()
+_sandbox_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_sandbox_executor() -> ThreadPoolExecutor:
+    """Return the worker threads for async sandbox runs, one per Docker slot.
+
+    Queued runs wait here instead of parking threads of the event loop's
+    default executor on _docker_slots.
+    """
+    global _sandbox_executor
+    with _sandbox_executor_lock:
+        if _sandbox_executor is None:
+            _sandbox_executor = ThreadPoolExecutor(
+                max_workers=SANDBOX_MAX_PARALLEL, thread_name_prefix="sandbox"
+            )
+        return _sandbox_executor
+
+
+def _real_fd(fileobj: Any) -> Optional[int]:
+    """The OS file descriptor behind a file object, or None for in-memory streams"""
+    try:
+        return fileobj.fileno()
+    except (AttributeError, io.UnsupportedOperation, OSError):
+        return None
+
+
+class _SendfileTarFile(tarfile.TarFile):
+    """Uncompressed tar writer that copies file payloads in the kernel with os.sendfile.
+
+    Used when both the source and the archive are real files; anything else
+    (in-memory archives, streams, platforms without sendfile) goes through tarfile.
+    """
+
+    def addfile(self, tarinfo, fileobj=None):
+        src_fd = _real_fd(fileobj) if fileobj is not None and tarinfo.isreg() else None
+        dst_fd = _real_fd(self.fileobj)
+        if src_fd is None or dst_fd is None or not hasattr(os, "sendfile"):
+            return super().addfile(tarinfo, fileobj)
+
+        self._check("awx")
+        tarinfo = copy.copy(tarinfo)
+        buf = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        self.fileobj.write(buf)
+        self.offset += len(buf)
+        # Hand the fd over at a known position, then move the buffered writer past the payload
+        self.fileobj.flush()
+        start = self.fileobj.tell()
+        offset, remaining = fileobj.tell(), tarinfo.size
+        while remaining:
+            sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+            if not sent:
+                raise tarfile.ReadError("unexpected end of data")
+            offset += sent
+            remaining -= sent
+        self.fileobj.seek(start + tarinfo.size)
+
+        blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+        if remainder > 0:
+            self.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        self.offset += blocks * tarfile.BLOCKSIZE
+        self.members.append(tarinfo)
+
+
+@functools.lru_cache(maxsize=64)
+def _split_imports(test_code: str) -> Tuple[str, str]:
+    """Split source into its module-level import statements and everything else.
+
+    Multi-line imports stay whole and imports nested in blocks stay in place.
+    Unparseable code is returned unchanged as the body.
+    """
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return '', test_code
+    lines = test_code.split('\n')
+    is_import = [False] * len(lines)
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for lineno in range(node.lineno - 1, node.end_lineno):
+                is_import[lineno] = True
+    imports = [line for line, flag in zip(lines, is_import) if flag]
+    others = [line for line, flag in zip(lines, is_import) if not flag]
+    return '\n'.join(imports), '\n'.join(others)
+
 @dataclass
 class SandboxConfig:
     """Configuration for sandbox environment"""
@@ -36,41 +206,119 @@ class SandboxResult:
 class DockerSandbox:
     """Execute tests in isolated Docker containers"""
     
-    def __init__(self, project_path: str, config: Optional[SandboxConfig] = None):
+    def __init__(
+        self, project_path: str, config: Optional[SandboxConfig] = None, fingerprint: Optional[str] = None
+    ):
         self.project_path = Path(project_path)
         self.config = config or SandboxConfig()
+        # project_fingerprint the image is built from, if already known; otherwise computed per build
+        self.fingerprint = fingerprint
         self.client = None
+        # Long-lived container that tests are exec'd in; started on first use
+        self._persistent = None
+        # Tag of the image holding the project and its dependencies, built on first use
+        self._project_image: Optional[str] = None
+        self._persistent_lock = threading.Lock()
+        # Set by close(); a closed sandbox never starts another container
+        self._closed = False
+        # Runs in flight, and whether retire() is waiting for them to finish
+        self._usage_lock = threading.Lock()
+        self._users = 0
+        self._retiring = False
         self._init_docker_client()
         
     def _init_docker_client(self):
         """Initialize Docker client"""
         try:
-            self.client = docker.from_env()
-            # Test connection
-            self.client.ping()
+            # Shared by every sandbox, so the connection and ping happen once per process
+            self.client = _get_docker_client()
             logger.info("docker_client_initialized")
         except docker.errors.DockerException as e:
             logger.error("docker_initialization_failed", error=str(e))
             raise RuntimeError(f"Failed to connect to Docker: {str(e)}")
     
+    async def run_test_async(self, test_code: str, test_name: str = "test") -> SandboxResult:
+        """Run test in the sandbox without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_sandbox_executor(), self.run_test_in_sandbox, test_code, test_name
+        )
+    
+    async def run_tests_async(self, tests: List[Tuple[str, str]]) -> List[Optional[SandboxResult]]:
+        """run_tests_in_sandbox without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_sandbox_executor(), self.run_tests_in_sandbox, tests
+        )
+
+    def run_tests_in_sandbox(self, tests: List[Tuple[str, str]]) -> List[Optional[SandboxResult]]:
+        """Run several (test_code, test_name) pairs with one pytest in the persistent container.
+
+        Each test keeps its own module, but interpreter start-up and Django setup
+        are paid once; a JUnit XML report maps outcomes back to each module. An
+        entry is None when its module reported nothing, because the batch crashed
+        or timed out first; callers run those on their own.
+        """
+        start_time = time.time()
+        batch_name = f"batch_{uuid.uuid4().hex[:8]}"
+        modules = [f"{test_name}_{batch_name}_{i}" for i, (_, test_name) in enumerate(tests)]
+        report = f"/tmp/{batch_name}.xml"
+        command = self._pytest_command(
+            [f"/tmp/tests/{module}.py" for module in modules],
+            f"--junitxml={report}",
+            # One module failing to import must not stop the rest of the batch
+            "--continue-on-collection-errors",
+        )
+        try:
+            archive = self._prepare_batch_archive(tests, modules)
+            with self._in_use(), _docker_slots:
+                container = self.start_persistent()
+                container.put_archive("/tmp", archive)
+                try:
+                    run = self._exec_test(container, command, timeout=self.config.timeout * len(tests))
+                    cases = self._read_batch_report(container, report)
+                finally:
+                    self._remove_run_files(container, [*(f"/tmp/tests/{module}.py" for module in modules), report])
+        except Exception as e:
+            logger.error("sandbox_batch_failed", error=str(e))
+            return [None] * len(tests)
+
+        duration = time.time() - start_time
+        results: List[Optional[SandboxResult]] = []
+        for module in modules:
+            failures = cases.get(module)
+            results.append(None if failures is None else SandboxResult(
+                success=not failures,
+                output=run.output,
+                error="\n\n".join(failures) if failures else None,
+                exit_code=1 if failures else 0,
+                duration=duration,
+            ))
+        return results
+
     def run_test_in_sandbox(self, test_code: str, test_name: str = "test") -> SandboxResult:
-        """Run test in isolated Docker container"""
+        """Run test in the project's persistent Docker container"""
         start_time = time.time()
-        container = None
+        # Concurrent runs share the container, so each gets its own test module
+        run_name = f"{test_name}_{uuid.uuid4().hex[:8]}"
         
         try:
             # Prepare test environment
-            test_archive = self._prepare_test_archive(test_code, test_name)
-            
-            # Create container
-            container = self._create_container(test_archive)
+            test_archive = self._prepare_test_archive(test_code, run_name)
             
-            # Run test
-            result = self._execute_test(container)
-            
-            # Get resource usage
-            stats = container.stats(stream=False)
-            result.resource_usage = self._parse_resource_stats(stats)
+            with self._in_use(), _docker_slots:
+                # Container creation and interpreter start-up are paid once per sandbox
+                container = self.start_persistent()
+                container.put_archive("/tmp", test_archive)
+                test_file = f"/tmp/tests/{run_name}.py"
+                try:
+                    # Run test
+                    result = self._exec_test(container, self._pytest_command([test_file]))
+                finally:
+                    self._remove_run_files(container, [test_file])
+                
+                # Get resource usage
+                result.resource_usage = self._read_cgroup_stats(container.id)
+                if result.resource_usage is None:
+                    result.resource_usage = self._parse_resource_stats(self._sample_stats(container))
             
             result.duration = time.time() - start_time
             return result
@@ -83,13 +331,88 @@ class DockerSandbox:
                 error=f"Sandbox execution failed: {str(e)}",
                 duration=time.time() - start_time
             )
+    
+    def start_persistent(self) -> docker.models.containers.Container:
+        """Start (once) an idle container that tests are exec'd in"""
+        with self._persistent_lock:
+            if self._closed:
+                raise RuntimeError("Sandbox is closed")
+            if self._persistent is None:
+                self._project_image = self._ensure_project_image()
+                container = self._create_container()
+                container.start()
+                self._persistent = container
+                logger.info("sandbox_container_started", container=container.short_id)
+            return self._persistent
+    
+    def warm_up(self) -> threading.Thread:
+        """Build the image and start the persistent container in the background.
+
+        A test submitted meanwhile waits in start_persistent for the same container.
+        """
+        thread = threading.Thread(target=self._warm_up, name="sandbox-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def _warm_up(self):
+        try:
+            self.start_persistent()
+        except Exception as e:
+            # The first test retries the start and reports any error itself
+            logger.warning("sandbox_warm_up_failed", error=str(e))
+    
+    @contextlib.contextmanager
+    def _in_use(self):
+        """Count a run as in flight, so retire() leaves its container alone until it ends"""
+        with self._usage_lock:
+            if self._closed:
+                raise RuntimeError("Sandbox is closed")
+            self._users += 1
+        try:
+            yield
         finally:
-            # Cleanup
-            if container:
-                try:
-                    container.remove(force=True)
-                except:
-                    pass
+            with self._usage_lock:
+                self._users -= 1
+                idle_retired = self._retiring and self._users == 0
+            if idle_retired:
+                self._retire_now()
+    
+    def retire(self):
+        """Close the sandbox and untag its image once the runs in flight have finished"""
+        with self._usage_lock:
+            self._retiring = True
+            busy = self._users > 0
+        if not busy:
+            self._retire_now()
+    
+    def _retire_now(self):
+        self.close()
+        self.remove_image()
+    
+    def close(self):
+        """Stop and remove the persistent container, if one was started"""
+        # Waits for an in-progress warm-up, whose container would otherwise leak
+        with self._persistent_lock:
+            self._closed = True
+            container, self._persistent = self._persistent, None
+        if container is not None:
+            try:
+                container.remove(force=True)
+            except Exception as e:
+                logger.warning("sandbox_container_remove_failed", error=str(e))
+    
+    def remove_image(self):
+        """Untag the project image once its container is gone.
+
+        Its parent layers are kept, so the next build still finds the installed
+        dependencies in the cache.
+        """
+        tag, self._project_image = self._project_image, None
+        if tag is not None:
+            try:
+                self.client.images.remove(tag, noprune=True)
+            except Exception as e:
+                logger.warning("sandbox_image_remove_failed", tag=tag, error=str(e))
     
     def validate_docker_setup(self) -> Tuple[bool, str]:
         """Validate Docker is properly set up"""
@@ -120,116 +443,137 @@ class DockerSandbox:
         return len(issues) == 0, "\n".join(issues)
     
     def _prepare_test_archive(self, test_code: str, test_name: str) -> bytes:
-        """Prepare tar archive with test and runner scripts."""
+        """Prepare tar archive holding the test module."""
         tar_buffer = io.BytesIO()
         
-        with tarfile.open(fileobj=tar_buffer, mode='w:gz') as tar:
+        # Uncompressed: put_archive accepts a plain tar, and gzip only costs CPU here
+        with tarfile.open(fileobj=tar_buffer, mode='w') as tar:
             # Add test file
-            test_content = self._prepare_test_content(test_code)
-            test_info = tarfile.TarInfo(name=f"tests/{test_name}.py")
-            test_info.size = len(test_content.encode())
-            test_info.mtime = time.time()
-            tar.addfile(test_info, io.BytesIO(test_content.encode()))
+            self._add_bytes(tar, f"tests/{test_name}.py", self._prepare_test_content(test_code).encode())
             
-            # Add runner script
-            runner_script = self._create_runner_script(test_name)
-            runner_info = tarfile.TarInfo(name="run_tests.py")
-            runner_info.size = len(runner_script.encode())
-            runner_info.mtime = time.time()
-            runner_info.mode = 0o755
-            tar.addfile(runner_info, io.BytesIO(runner_script.encode()))
             
-            # Add requirements file
-            requirements = self._get_requirements()
-            req_info = tarfile.TarInfo(name="requirements.txt")
-            req_info.size = len(requirements.encode())
-            req_info.mtime = time.time()
-            tar.addfile(req_info, io.BytesIO(requirements.encode()))
-            
-        tar_buffer.seek(0)
-        return tar_buffer.read()
-    
-    def _prepare_test_content(self, test_code: str) -> str:
-        """Prepare test content with proper Django setup"""
-        setup_code = """
-import os
-import sys
-import django
+        return tar_buffer.getvalue()
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{settings}')
-
-# Add project to path
-sys.path.insert(0, '/app')
+    def _prepare_batch_archive(self, tests: List[Tuple[str, str]], modules: List[str]) -> bytes:
+        """Prepare tar archive with every test module of a batch"""
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode='w') as tar:
+            for (test_code, _), module in zip(tests, modules):
+                self._add_bytes(tar, f"tests/{module}.py", self._prepare_test_content(test_code).encode())
+        return tar_buffer.getvalue()
 
-django.setup()
+    @staticmethod
+    def _read_batch_report(container, report: str) -> Dict[str, List[str]]:
+        """Read a batch's JUnit report back from the container; empty if it was never written"""
+        try:
+            chunks, _ = container.get_archive(report)
+        except docker.errors.NotFound:
+            return {}
+        with tarfile.open(fileobj=io.BytesIO(b"".join(chunks)), mode='r:') as tar:
+            return junit_cases_by_module(tar.extractfile(tar.next()))
+    
+    def _ensure_project_image(self) -> str:
+        """Return the tag of an image with the project copied in, building it if needed.
 
-""".format(settings=self.config.django_settings or 'settings')
+        The tag is derived from the base image, the sandbox requirements and every
+        project file's path, size and mtime, so an unchanged project reuses its image.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(self.config.image.encode())
+        digest.update(self._get_requirements().encode())
+        fingerprint = self.fingerprint or project_fingerprint(
+            self.project_path, self.EXCLUDE_NAMES, self.EXCLUDE_SUFFIXES
+        )
+        digest.update(fingerprint.encode())
+        tag = f"test-agent-sandbox:{digest.hexdigest()}"
         
-        # Ensure imports are at the top
-        lines = test_code.split('\n')
-        import_lines = []
-        other_lines = []
+        try:
+            self.client.images.get(tag)
+            return tag
+        except docker.errors.ImageNotFound:
+            pass
         
-        for line in lines:
-            if line.strip().startswith(('import ', 'from ')):
-                import_lines.append(line)
-            else:
-                other_lines.append(line)
+        # A real file rather than memory, so large projects are copied with sendfile
+        with tempfile.TemporaryFile() as context:
+            with _SendfileTarFile.open(fileobj=context, mode='w') as tar:
+                self._add_project_files(tar)
+                self._add_bytes(tar, ".sandbox-requirements.txt", self._get_requirements().encode())
+                # Named so that a Dockerfile of the project's own is not shadowed
+                self._add_bytes(tar, ".sandbox.Dockerfile", _DOCKERFILE.format(image=self.config.image).encode())
+            context.seek(0)
+            logger.info("building_sandbox_image", tag=tag)
+            self.client.images.build(
+                fileobj=context, custom_context=True, dockerfile=".sandbox.Dockerfile", tag=tag, rm=True
+            )
+        return tag
+    
+    @staticmethod
+    def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes, mode: int = 0o644):
+        """Add an in-memory file to the archive"""
+        info = tarfile.TarInfo(name=name)
+        info.size = len(data)
+        info.mtime = time.time()
+        info.mode = mode
+        tar.addfile(info, io.BytesIO(data))
+    
+    def _prepare_test_content(self, test_code: str) -> str:
+        """Prepare test content with proper Django setup"""
+        setup_code = _DJANGO_SETUP_TEMPLATE.format(settings=self.config.django_settings or 'settings')
         
-        return '\n'.join(import_lines) + '\n' + setup_code + '\n'.join(other_lines)
+        # Ensure imports are at the top
+        imports, body = _split_imports(test_code)
+        return imports + '\n' + setup_code + body
     
-    def _create_runner_script(self, test_name: str) -> str:
-        """Create test runner script"""
-        return f"""#!/usr/bin/env python3
-import unittest
-import sys
-from pathlib import Path
+    def _pytest_command(self, test_files: List[str], *options: str) -> List[str]:
+        """pytest over uploaded test files, configured for the project in /app.
 
-# Add project and test directories to path
-sys.path.insert(0, '/app')
-sys.path.insert(0, '/tmp')
-
-# Import test module
-from tests.{test_name} import *
-
-if __name__ == '__main__':
-    unittest.main()
-"""
+        pytest and pytest-django are part of SANDBOX_REQUIREMENTS, so generated
+        pytest-style tests and fixtures run exactly as they do locally.
+        """
+        return [
+            "python", "-m", "pytest", *test_files, "-q", "--tb=short",
+            # The image is read-only, so pytest must not try to write its cache
+            "-p", "no:cacheprovider",
+            "--ds", self.config.django_settings or "settings",
+            *options,
+        ]
 
     def _get_requirements(self) -> str:
         """Get requirements for test environment"""
-        return """django>=3.2,<5.0
-pytest>=7.0.0
-pytest-django>=4.5.0
-factory-boy>=3.2.0
-"""
+        return SANDBOX_REQUIREMENTS
 
+    EXCLUDE_NAMES = PROJECT_EXCLUDE_NAMES
+    EXCLUDE_SUFFIXES = PROJECT_EXCLUDE_SUFFIXES
+    
+    def _iter_project_files(self) -> Iterator[str]:
+        """Yield paths of project files to archive, pruning excluded directories"""
+        return iter_project_files(self.project_path, self.EXCLUDE_NAMES, self.EXCLUDE_SUFFIXES)
+    
     def _add_project_files(self, tar: tarfile.TarFile):
         """Add project files to the archive"""
-        exclude = ['__pycache__', '*.pyc', '*.pyo', '*.pyd', '.git', 'venv', 'env']
+        # Fewer, larger reads and writes for big fixtures or database dumps
+        # (a _SendfileTarFile skips the user-space copy entirely)
+        tar.copybufsize = TAR_COPY_BUFSIZE
+        root = str(self.project_path)
         
-        for file_path in self.project_path.rglob('*'):
-            if file_path.is_file() and not any(file_path.match(pattern) for pattern in exclude):
-                try:
-                    arcname = str(file_path.relative_to(self.project_path))
-                    tar.add(file_path, arcname=arcname, recursive=False)
-                except Exception as e:
-                    logger.warning("failed_to_add_file", path=file_path, error=str(e))
+        for file_path in self._iter_project_files():
+            try:
+                tar.add(file_path, arcname=os.path.relpath(file_path, root), recursive=False)
+            except Exception as e:
+                logger.warning("failed_to_add_file", path=file_path, error=str(e))
     
-    def _create_container(self, test_archive: bytes) -> docker.models.containers.Container:
+    def _create_container(
+        self,
+        test_archive: Optional[bytes] = None,
+        command: Optional[List[str]] = None,
+    ) -> docker.models.containers.Container:
         """Create and configure Docker container"""
         
-        volumes = {
-            str(self.project_path): {
-                'bind': '/app',
-                'mode': 'ro' if self.config.read_only_project_mount else 'rw'
-            }
-        }
-
+        # The project lives in the image, so nothing on the host is mounted
         container = self.client.containers.create(
-            image=self.config.image,
-            command=["/tmp/run_tests.py"],
+            image=self._project_image or self.config.image,
+            # Idle by default; tests are exec'd into the running container
+            command=command or ["sleep", "infinity"],
             working_dir="/app",
             mem_limit=self.config.memory_limit,
             cpu_quota=int(self.config.cpu_limit * 100000),
@@ -240,34 +584,32 @@ factory-boy>=3.2.0
                 'PYTHONUNBUFFERED': '1',
                 'PYTHONDONTWRITEBYTECODE': '1',
                 'PYTHONPATH': '/app'
-            },
-            volumes=volumes
+            }
         )
         
         # Copy test files to the writable /tmp directory
-        container.put_archive("/tmp", test_archive)
+        if test_archive is not None:
+            container.put_archive("/tmp", test_archive)
         return container
     
-    def _execute_test(self, container) -> SandboxResult:
-        """Execute test in container and collect results"""
-        container.start()
-        
+    def _exec_test(self, container, command: List[str], timeout: Optional[int] = None) -> SandboxResult:
+        """Run a command against uploaded tests inside an already running container"""
+        api = self.client.api
         try:
-            # Wait for container to finish with timeout
-            container.wait(timeout=self.config.timeout)
-            
-            # Get container logs
-            logs = container.logs(stdout=True, stderr=True, stream=False).decode()
-            
-            # Get exit code
-            exit_code = container.attrs['State']['ExitCode']
-            
+            # Exec has no timeout of its own, so coreutils' timeout enforces it
+            exec_id = api.exec_create(
+                container.id,
+                ["timeout", str(timeout or self.config.timeout), *command],
+                environment=_EXEC_ENVIRONMENT,
+                workdir="/app",
+            )["Id"]
+            output = self._collect_output(api.exec_start(exec_id, stream=True))
+            exit_code = api.exec_inspect(exec_id)["ExitCode"]
             return SandboxResult(
                 success=exit_code == 0,
-                output=logs,
+                output=output,
                 exit_code=exit_code
             )
-            
         except Exception as e:
             return SandboxResult(
                 success=False,
@@ -276,6 +618,78 @@ factory-boy>=3.2.0
                 exit_code=-1
             )
     
+    def _remove_run_files(self, container, paths: List[str]):
+        """Delete a run's uploads from the persistent container, whose /tmp is a small tmpfs"""
+        api = self.client.api
+        try:
+            api.exec_start(api.exec_create(container.id, ["rm", "-f", *paths])["Id"])
+        except Exception as e:
+            logger.warning("sandbox_cleanup_failed", error=str(e))
+    
+    @staticmethod
+    def _collect_output(chunks: Iterable[bytes], limit: int = SANDBOX_OUTPUT_LIMIT) -> str:
+        """Decode streamed output as it arrives, keeping at most its last ``limit`` characters"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        kept: Deque[str] = deque()
+        size = 0
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            kept.append(text)
+            size += len(text)
+            # Failure summaries come last, so older output is what gets dropped
+            while size - len(kept[0]) >= limit:
+                size -= len(kept.popleft())
+        kept.append(decoder.decode(b"", final=True))
+        return "".join(kept)[-limit:]
+    
+    # Where a container's cgroup lives, relative to CGROUP_ROOT, for the usual layouts:
+    # cgroup v2 under the systemd or cgroupfs driver, then cgroup v1 (memory, cpuacct)
+    CGROUP_ROOT = "/sys/fs/cgroup"
+    _CGROUP_V2_DIRS = ("system.slice/docker-{id}.scope", "docker/{id}")
+    
+    def _read_cgroup_stats(self, container_id: str) -> Optional[Dict[str, Any]]:
+        """Read memory and CPU usage straight from the container's cgroup files.
+
+        A few small file reads instead of a stats request to the daemon. Returns
+        None when the cgroup is not visible, e.g. with a remote or VM-hosted daemon.
+        """
+        root = self.CGROUP_ROOT
+        for layout in self._CGROUP_V2_DIRS:
+            base = os.path.join(root, layout.format(id=container_id))
+            try:
+                with open(os.path.join(base, "memory.current")) as f:
+                    memory = int(f.read())
+                with open(os.path.join(base, "memory.max")) as f:
+                    limit = f.read().strip()
+                with open(os.path.join(base, "cpu.stat")) as f:
+                    # First line is "usage_usec N"; docker reports CPU time in nanoseconds
+                    cpu = int(f.readline().split()[1]) * 1000
+            except (OSError, ValueError, IndexError):
+                continue
+            return {
+                'memory_usage': memory,
+                'memory_limit': 0 if limit == "max" else int(limit),
+                'cpu_usage': cpu,
+            }
+        try:
+            with open(os.path.join(root, "memory", "docker", container_id, "memory.usage_in_bytes")) as f:
+                memory = int(f.read())
+            with open(os.path.join(root, "memory", "docker", container_id, "memory.limit_in_bytes")) as f:
+                limit = int(f.read())
+            with open(os.path.join(root, "cpuacct", "docker", container_id, "cpuacct.usage")) as f:
+                cpu = int(f.read())
+        except (OSError, ValueError):
+            return None
+        return {'memory_usage': memory, 'memory_limit': limit, 'cpu_usage': cpu}
+    
+    def _sample_stats(self, container) -> Dict[str, Any]:
+        """Take one stats sample; one_shot skips the daemon's wait for a second CPU cycle"""
+        try:
+            return container.stats(stream=False, one_shot=True)
+        except docker.errors.InvalidVersion:
+            # Daemons older than API 1.41 only offer the two-cycle sample
+            return container.stats(stream=False)
+    
     def _parse_resource_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
         """Parse Docker container resource statistics"""
         try:
@@ -294,9 +708,52 @@ factory-boy>=3.2.0
             return {}
 
     def __del__(self):
-        """Clean up Docker client on destruction"""
-        if hasattr(self, 'client') and self.client:
-            try:
-                self.client.close()
-            except:
-                pass
+        """Remove the persistent container if close() was never called"""
+        if getattr(self, '_persistent', None) is not None:
+            self.close()
+
+
+_shared_sandboxes_lock = threading.Lock()
+# (project path, settings) -> (project fingerprint, sandbox whose image holds that state)
+_shared_sandboxes: Dict[Tuple[Path, Optional[str]], Tuple[str, DockerSandbox]] = {}
+
+
+def get_shared_sandbox(project_path: Union[str, Path], config: SandboxConfig) -> DockerSandbox:
+    """Return the process-wide sandbox for a project, validating and warming it up on first use.
+
+    Runners come and go during a session, but the container outlives them, so
+    the image build and warm-up happen once per project state: a sandbox is only
+    replaced when the project fingerprint changes. close_shared_sandboxes removes
+    every container once, at exit. Raises RuntimeError when Docker is not usable.
+    """
+    path = Path(project_path).resolve()
+    key = (path, config.django_settings)
+    fingerprint = project_fingerprint(path, DockerSandbox.EXCLUDE_NAMES, DockerSandbox.EXCLUDE_SUFFIXES)
+    with _shared_sandboxes_lock:
+        entry = _shared_sandboxes.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        sandbox = DockerSandbox(str(path), config, fingerprint=fingerprint)
+        if entry is None:
+            # Docker only needs checking once; a changed project reuses the verdict
+            is_valid, message = sandbox.validate_docker_setup()
+            if not is_valid:
+                raise RuntimeError(message)
+        # Get the container ready while the user is still writing the test
+        sandbox.warm_up()
+        _shared_sandboxes[key] = (fingerprint, sandbox)
+    if entry is not None:
+        # The project changed under the old container, whose image is now stale;
+        # runners still holding it finish their runs first
+        entry[1].retire()
+    return sandbox
+
+
+@atexit.register
+def close_shared_sandboxes():
+    """Remove the containers of every shared sandbox"""
+    with _shared_sandboxes_lock:
+        sandboxes = [sandbox for _, sandbox in _shared_sandboxes.values()]
+        _shared_sandboxes.clear()
+    for sandbox in sandboxes:
+        sandbox.close()
@@ -1,12 +1,17 @@
 import asyncio
+import dataclasses
+import functools
+import hashlib
+import itertools
+import queue
 import tempfile
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple, Union, Callable
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Any, Tuple, Union, Callable
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 import logging
-import platform
 import signal
 import re
 import os
@@ -16,28 +21,39 @@ import json
 import time
 import importlib.util
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    BarColumn,
-    TaskProgressColumn,
-    TimeRemainingColumn
-)
-from rich.prompt import Prompt, Confirm
-from rich.traceback import Traceback
-
-from .sandbox import DockerSandbox, SandboxResult, SandboxConfig
+from .junit_report import junit_cases_by_module
+from .project_files import PROJECT_EXCLUDE_NAMES, project_fingerprint
 from .error_analyzer import TestErrorAnalyzer, ErrorAnalysis
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-console = Console()
+if TYPE_CHECKING:
+    from rich.console import Console
+    from .sandbox import DockerSandbox, SandboxResult
+
+
+@functools.lru_cache(maxsize=None)
+def _console() -> "Console":
+    """The runner's rich console; rich is imported on first output, not with the runner"""
+    from rich.console import Console
+
+    return Console()
+
+# The settings module manage.py points Django at
+_DJANGO_SETTINGS_RE = re.compile(
+    r"""os\.environ\.setdefault\(\s*["']DJANGO_SETTINGS_MODULE["']\s*,\s*["']([^"']+)["']"""
+)
+
+# Maps every non-alphanumeric ASCII character to "_" for test file names
+_UNSAFE_TO_UNDERSCORE = str.maketrans({chr(i): "_" for i in range(128) if not chr(i).isalnum()})
+
+def _safe_test_name(test_name: str) -> str:
+    """Replace characters that are not alphanumeric with underscores."""
+    if test_name.isascii():
+        return test_name.translate(_UNSAFE_TO_UNDERSCORE).strip("_")
+    return "".join(c if c.isalnum() else "_" for c in test_name).strip("_")
 
 @dataclass
 class TestResult:
@@ -53,57 +69,257 @@ class TestResult:
     test_file: Optional[str] = None
     execution_mode: str = "local"  # 'local' or 'sandbox'
 
+# pytest in the agent's own interpreter; runners append their options and files
+_PYTEST_COMMAND = (sys.executable, '-m', 'pytest')
+# Bytes of each output stream kept per run; verbose runs keep their tail,
+# where pytest prints its failure summary
+TEST_OUTPUT_LIMIT = 1024 * 1024
+# Passing results remembered per process, so an identical retest of an unchanged
+# project returns at once; failures always run again
+RESULT_CACHE_SIZE = 128
+_result_cache: "OrderedDict[str, TestResult]" = OrderedDict()
+# Dependency trees are left out of the project fingerprint; manifests still count
+_FINGERPRINT_EXCLUDE_NAMES = PROJECT_EXCLUDE_NAMES | {"node_modules"}
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read a stream to EOF, keeping only its last `limit` bytes"""
+    chunks: Deque[bytes] = deque()
+    size = 0
+    while True:
+        chunk = await stream.read(64 * 1024)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        while size - len(chunks[0]) >= limit:
+            size -= len(chunks.popleft())
+    return b"".join(chunks)[-limit:]
+
+
+async def _communicate_tail(process: asyncio.subprocess.Process, limit: Optional[int] = None) -> Tuple[bytes, bytes]:
+    """process.communicate(), keeping only the tail of stdout and stderr"""
+    limit = limit or TEST_OUTPUT_LIMIT
+    stdout, stderr = await asyncio.gather(_read_tail(process.stdout, limit), _read_tail(process.stderr, limit))
+    await process.wait()
+    return stdout, stderr
+
+
+@functools.lru_cache(maxsize=64)
+def _syntax_error(test_code: str) -> Optional[str]:
+    """The syntax error in Python source, if any; cached so retried code is parsed once"""
+    try:
+        ast.parse(test_code)
+        return None
+    except SyntaxError as e:
+        return f"Syntax error in generated test: {e}"
+
+
+@functools.lru_cache(maxsize=16)
+def _manage_py_settings(manage_py: str, mtime_ns: int) -> str:
+    """The settings module a manage.py selects, or ''.
+
+    Keyed by mtime so the runner built for every interactive test reads the
+    file once, yet an edited manage.py is read again.
+    """
+    try:
+        with open(manage_py, 'r', encoding='utf-8') as f:
+            match = _DJANGO_SETTINGS_RE.search(f.read())
+    except Exception:
+        return ''
+    return match.group(1) if match else ''
+
+
+@functools.lru_cache(maxsize=1)
+def _xdist_available() -> bool:
+    """Whether pytest-xdist is importable; probed once per process"""
+    return importlib.util.find_spec("xdist") is not None
+
+
+def _sandbox_module_name(test_name: str) -> str:
+    """Module name a test is uploaded to the sandbox under"""
+    return f"test_{_safe_test_name(test_name) or 'generated'}"
+
+
+def _sandbox_test_result(result: "SandboxResult", test_name: str) -> TestResult:
+    """TestResult for a finished sandbox run"""
+    return TestResult(
+        success=result.success,
+        output=result.output,
+        error=None if result.success else (result.error or result.output),
+        duration=result.duration or 0.0,
+        test_name=test_name,
+        resource_usage=result.resource_usage,
+        execution_mode="sandbox",
+    )
+
+
 class BaseTestRunner:
     """Base class for running tests."""
+    # Emptied run directories kept for reuse instead of being created and removed per test
+    WORKSPACE_POOL_SIZE = 4
+    # Tests run at once by the default _run_batch; past a couple per core the
+    # test subprocesses only contend with each other
+    MAX_WORKERS = min((os.cpu_count() or 1) * 2, 16)
+
     def __init__(self, project_path: Union[str, Path], timeout: int = 300):
         self.project_path = Path(project_path).resolve()
         self.timeout = timeout
         self.temp_dir = self.project_path / ".test_tmp"
         self.temp_dir.mkdir(exist_ok=True)
+        self._workspaces: "queue.SimpleQueue[Path]" = queue.SimpleQueue()
 
     async def run_test(self, test_code: str, test_name: str, with_coverage: bool = False) -> TestResult:
         raise NotImplementedError
 
     def _create_test_file(self, test_code: str, test_name: str, extension: str) -> Path:
-        test_run_dir = self.temp_dir / f"{test_name}_{int(time.time())}"
-        test_run_dir.mkdir(parents=True, exist_ok=True)
-        safe_name = "".join(c if c.isalnum() else "_" for c in test_name).strip("_")
+        safe_name = _safe_test_name(test_name)
+        try:
+            test_run_dir = self._workspaces.get_nowait()
+        except queue.Empty:
+            # mkdtemp picks a fresh name atomically (O_EXCL), so concurrent runs,
+            # or concurrent CLI sessions, never share a directory
+            self.temp_dir.mkdir(exist_ok=True)
+            test_run_dir = Path(tempfile.mkdtemp(prefix="run_", dir=self.temp_dir))
         test_file = test_run_dir / f"test_{safe_name}{extension}"
-        with open(test_file, 'w', encoding='utf-8') as f:
-            f.write(test_code)
+        # Encode once and write the bytes directly, bypassing the text-mode layer
+        test_file.write_bytes(test_code.encode('utf-8'))
         return test_file
 
+    def _release_test_file(self, test_file: Path):
+        """Delete a finished test file and return its directory to the pool"""
+        test_run_dir = test_file.parent
+        try:
+            test_file.unlink(missing_ok=True)
+            if self._workspaces.qsize() < self.WORKSPACE_POOL_SIZE and not any(test_run_dir.iterdir()):
+                self._workspaces.put(test_run_dir)
+                return
+        except OSError:
+            pass
+        shutil.rmtree(test_run_dir, ignore_errors=True)
+
+    async def run_test_memoized(self, test_code: str, test_name: str, with_coverage: bool = False) -> TestResult:
+        """run_test, reusing the result of an identical passing run against the same project state"""
+        fingerprint = await asyncio.to_thread(
+            project_fingerprint, self.project_path, _FINGERPRINT_EXCLUDE_NAMES
+        )
+        key = hashlib.blake2b(
+            "\0".join((type(self).__name__, str(self.project_path), fingerprint, str(with_coverage), test_code)).encode(),
+            digest_size=16,
+        ).hexdigest()
+        cached = _result_cache.get(key)
+        if cached is not None:
+            _result_cache.move_to_end(key)
+            return dataclasses.replace(cached, test_name=test_name)
+
+        result = await self.run_test(test_code, test_name, with_coverage)
+        if result.success:
+            _result_cache[key] = result
+            while len(_result_cache) > RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+        return result
+
+    async def run_tests_batch(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        """Run several (test_code, test_name) pairs; results are returned in input order.
+
+        Identical test code runs once and its result is shared under each name.
+        """
+        slots: Dict[str, int] = {}
+        unique: List[Tuple[str, str]] = []
+        for test_code, test_name in tests:
+            if test_code not in slots:
+                slots[test_code] = len(unique)
+                unique.append((test_code, test_name))
+        ran = await self._run_batch(unique)
+        results = []
+        for test_code, test_name in tests:
+            result = ran[slots[test_code]]
+            results.append(result if result.test_name == test_name else dataclasses.replace(result, test_name=test_name))
+        return results
+
+    async def _run_batch(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        """Run several (test_code, test_name) pairs concurrently, at most MAX_WORKERS at a time.
+
+        Only MAX_WORKERS runs exist at once; the next starts as soon as any
+        finishes. A run that raises becomes a failed result. Results are
+        returned in input order.
+        """
+        results: List[Optional[TestResult]] = [None] * len(tests)
+        queued = iter(enumerate(tests))
+        pending: Dict["asyncio.Task[TestResult]", int] = {}
+        try:
+            while True:
+                # MAX_WORKERS is read on every refill, so changing it mid-batch resizes the batch
+                free = max(self.MAX_WORKERS - len(pending), 0)
+                for i, (test_code, test_name) in itertools.islice(queued, free):
+                    pending[asyncio.ensure_future(self.run_test(test_code, test_name))] = i
+                if not pending:
+                    return results
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = pending.pop(task)
+                    try:
+                        results[i] = task.result()
+                    except Exception as e:
+                        results[i] = TestResult(success=False, output="", error=str(e), test_name=tests[i][1])
+        finally:
+            # Only non-empty if the batch itself was cancelled
+            for task in pending:
+                task.cancel()
+
     def validate_test(self, test_code: str) -> Optional[str]:
         """Validate the test code for basic syntax errors."""
-        try:
-            ast.parse(test_code)
+        return _syntax_error(test_code)
+
+    def _syntax_failure(self, test_code: str, test_name: str) -> Optional[TestResult]:
+        """A failed result for code that cannot parse, so no process or container is started"""
+        error = self.validate_test(test_code)
+        if error is None:
             return None
-        except SyntaxError as e:
-            return f"Syntax error in generated test: {e}"
+        return TestResult(success=False, output="", error=error, duration=0.0, test_name=test_name)
 
     def cleanup(self):
         if self.temp_dir.exists():
             shutil.rmtree(self.temp_dir)
+        self._workspaces = queue.SimpleQueue()
 
 class PytestTestRunner(BaseTestRunner):
     """A test runner for pytest-based projects (Flask, etc.)."""
+    def _pytest_env(self) -> Dict[str, str]:
+        """Environment for pytest subprocesses"""
+        # No __pycache__ next to the test file, so its directory can be reused
+        return {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+
+    def _pytest_options(self) -> List[str]:
+        """Extra pytest command-line options"""
+        return []
+
+    @functools.cached_property
+    def _subprocess_env(self) -> Dict[str, str]:
+        """_pytest_env, built once per runner and shared by its runs"""
+        return self._pytest_env()
+
     async def run_test(self, test_code: str, test_name: str, with_coverage: bool = False) -> TestResult:
+        failure = self._syntax_failure(test_code, test_name)
+        if failure is not None:
+            return failure
         test_file = self._create_test_file(test_code, test_name, ".py")
         start_time = time.time()
         
-        cmd = [sys.executable, '-m', 'pytest', str(test_file), '-v']
+        cmd = [*_PYTEST_COMMAND, *self._pytest_options(), str(test_file), '-v']
         
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.project_path)
+                cwd=str(self.project_path),
+                env=self._subprocess_env
             )
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+            stdout, stderr = await asyncio.wait_for(_communicate_tail(process), timeout=self.timeout)
             
-            output = stdout.decode()
-            error = stderr.decode()
+            output = stdout.decode(errors="replace")
+            error = stderr.decode(errors="replace")
             
             return TestResult(
                 success=process.returncode == 0,
@@ -114,10 +330,86 @@ class PytestTestRunner(BaseTestRunner):
                 test_file=str(test_file)
             )
         except asyncio.TimeoutError:
-            return TestResult(success=False, error="Test timed out.", duration=time.time() - start_time)
+            return TestResult(success=False, output="", error="Test timed out.", duration=time.time() - start_time)
+        finally:
+            self._release_test_file(test_file)
+
+    async def _run_batch(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        """Run several (test_code, test_name) pairs in one pytest process.
+
+        Interpreter start-up, plugin loading and framework setup are paid once
+        for the batch; a JUnit XML report maps outcomes back to each test.
+        Results are returned in input order.
+        """
+        results = [self._syntax_failure(test_code, test_name) for test_code, test_name in tests]
+        runnable = [i for i, result in enumerate(results) if result is None]
+        if runnable:
+            ran = await self._run_pytest_batch([tests[i] for i in runnable])
+            for i, result in zip(runnable, ran):
+                results[i] = result
+        return results
+
+    async def _run_pytest_batch(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        batch_dir = Path(tempfile.mkdtemp(prefix="batch_", dir=self.temp_dir))
+        test_files = []
+        for i, (test_code, test_name) in enumerate(tests):
+            # The index keeps module names unique when test names collide
+            test_file = batch_dir / f"test_{_safe_test_name(test_name) or 'generated'}_{i}.py"
+            test_file.write_bytes(test_code.encode('utf-8'))
+            test_files.append(test_file)
+        report = batch_dir / "report.xml"
+
+        cmd = [
+            *_PYTEST_COMMAND, *self._pytest_options(),
+            *map(str, test_files), '-q', '--tb=short', f'--junitxml={report}',
+            # One module failing to import must not stop the rest of the batch
+            '--continue-on-collection-errors',
+        ]
+        # Spread the batch over cores when the project has pytest-xdist
+        if len(tests) > 1 and _xdist_available():
+            cmd += ['-n', 'auto']
+
+        start_time = time.time()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=str(self.project_path),
+                env=self._subprocess_env
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(_communicate_tail(process), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                duration = time.time() - start_time
+                return [
+                    TestResult(success=False, output="", error="Test timed out.", duration=duration, test_name=name)
+                    for _, name in tests
+                ]
+            duration = time.time() - start_time
+            output = stdout.decode(errors="replace")
+            cases = junit_cases_by_module(report) if report.exists() else {}
+
+            results = []
+            for (_, test_name), test_file in zip(tests, test_files):
+                failures = cases.get(test_file.stem)
+                if failures is None:
+                    # Nothing was reported for this module, e.g. a usage error or a crash
+                    error = stderr.decode(errors="replace") or output
+                    results.append(TestResult(success=False, output=output, error=error,
+                                              duration=duration, test_name=test_name))
+                    continue
+                results.append(TestResult(
+                    success=not failures,
+                    output=output,
+                    error="\n\n".join(failures) if failures else None,
+                    duration=duration,
+                    test_name=test_name,
+                ))
+            return results
         finally:
-            if test_file.parent.exists():
-                shutil.rmtree(test_file.parent)
+            shutil.rmtree(batch_dir, ignore_errors=True)
 
 class NodeTestRunner(BaseTestRunner):
     """A test runner for Node.js projects (Jest)."""
@@ -135,10 +427,10 @@ class NodeTestRunner(BaseTestRunner):
                 stderr=asyncio.subprocess.PIPE,
                 cwd=str(self.project_path)
             )
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+            stdout, stderr = await asyncio.wait_for(_communicate_tail(process), timeout=self.timeout)
 
-            output = stdout.decode()
-            error = stderr.decode()
+            output = stdout.decode(errors="replace")
+            error = stderr.decode(errors="replace")
 
             return TestResult(
                 success=process.returncode == 0,
@@ -149,59 +441,62 @@ class NodeTestRunner(BaseTestRunner):
                 test_file=str(test_file)
             )
         except asyncio.TimeoutError:
-            return TestResult(success=False, error="Test timed out.", duration=time.time() - start_time)
+            return TestResult(
+                success=False, output="", error="Test timed out.", duration=time.time() - start_time, test_name=test_name
+            )
         except FileNotFoundError:
-             return TestResult(success=False, error="`npx` command not found. Is Node.js installed and in your PATH?", duration=time.time() - start_time)
+            return TestResult(
+                success=False,
+                output="",
+                error="`npx` command not found. Is Node.js installed and in your PATH?",
+                duration=time.time() - start_time,
+                test_name=test_name,
+            )
         finally:
-            if test_file.parent.exists():
-                shutil.rmtree(test_file.parent)
+            self._release_test_file(test_file)
 
 
 class DjangoTestRunner(PytestTestRunner):
     """The original TestRunner, now specifically for Django."""
+    # Sandbox tests sharing one interpreter and one django.setup() in a batch
+    SANDBOX_BATCH_SIZE = 8
+
     def __init__(
         self,
         project_path: Union[str, Path],
-        use_sandbox: bool = True,
+        use_sandbox: bool = False,
         max_workers: int = 4,
         coverage_threshold: int = 80,
         timeout: int = 300,
     ):
         super().__init__(project_path, timeout)
+        # manage.py does not change during a session, so it is read once
+        self._django_settings = self._detect_django_settings()
         self.use_sandbox = use_sandbox
-        self.sandbox = None
+        self.sandbox: Optional["DockerSandbox"] = None
         if use_sandbox:
             self._init_sandbox()
 
     def _init_sandbox(self):
-        """Initialize sandbox if needed"""
+        """Attach the project's shared sandbox, falling back to local runs without Docker"""
         try:
-            self.sandbox = DockerSandbox(
-                project_path=self.project_path,
-                config=SandboxConfig(
-                    django_settings=self._detect_django_settings()
-                )
+            # Docker is only imported by runners that actually use the sandbox
+            from .sandbox import SandboxConfig, get_shared_sandbox
+
+            self.sandbox = get_shared_sandbox(
+                self.project_path, SandboxConfig(django_settings=self._django_settings)
             )
-            is_valid, message = self.sandbox.validate_docker_setup()
-            if not is_valid:
-                console.print(f"[yellow]Warning: {message}[/yellow]")
-                self.use_sandbox = False
         except Exception as e:
-            console.print(f"[yellow]Warning: Failed to initialize sandbox: {e}[/yellow]")
+            _console().print(f"[yellow]Warning: Failed to initialize sandbox: {e}[/yellow]")
             self.use_sandbox = False
 
     def _detect_django_settings(self) -> str:
         manage_py = self.project_path / 'manage.py'
-        if manage_py.exists():
-            try:
-                with open(manage_py, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    match = re.search(r'os.environ.setdefault\s*\(\s*["\\]\'DJANGO_SETTINGS_MODULE["\\]\'\s*,\s*["\\]([^"\\]+)["\\]\)\s*', content)
-                    if match:
-                        return match.group(1)
-            except Exception:
-                pass
-        return ''
+        try:
+            mtime_ns = manage_py.stat().st_mtime_ns
+        except OSError:
+            return ''
+        return _manage_py_settings(str(manage_py), mtime_ns)
 
     async def run_test(
         self,
@@ -209,57 +504,65 @@ class DjangoTestRunner(PytestTestRunner):
         test_name: str = "generated_test",
         with_coverage: bool = False,
     ) -> TestResult:
-        test_file = self._create_test_file(test_code, test_name, ".py")
-        start_time = time.time()
-        
-        env = os.environ.copy()
-        settings_module = self._detect_django_settings()
-        if settings_module:
-            env['DJANGO_SETTINGS_MODULE'] = settings_module
+        if self.use_sandbox and self.sandbox is not None:
+            return await self._run_in_sandbox(test_code, test_name)
+        return await super().run_test(test_code, test_name, with_coverage)
+
+    async def _run_in_sandbox(self, test_code: str, test_name: str) -> TestResult:
+        """Run the test in the Docker sandbox; concurrency is capped by the sandbox"""
+        failure = self._syntax_failure(test_code, test_name)
+        if failure is not None:
+            return failure
+        result = await self.sandbox.run_test_async(test_code, _sandbox_module_name(test_name))
+        return _sandbox_test_result(result, test_name)
+
+    async def _run_batch_in_sandbox(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        """Run tests in the sandbox SANDBOX_BATCH_SIZE at a time, one interpreter per batch"""
+        results = [self._syntax_failure(test_code, test_name) for test_code, test_name in tests]
+        runnable = [i for i, result in enumerate(results) if result is None]
+        chunks = [runnable[k:k + self.SANDBOX_BATCH_SIZE] for k in range(0, len(runnable), self.SANDBOX_BATCH_SIZE)]
+        batches = await asyncio.gather(*(
+            self.sandbox.run_tests_async([(tests[i][0], _sandbox_module_name(tests[i][1])) for i in chunk])
+            for chunk in chunks
+        ))
+
+        unreported = []
+        for chunk, batch in zip(chunks, batches):
+            for i, result in zip(chunk, batch):
+                if result is None:
+                    unreported.append(i)
+                else:
+                    results[i] = _sandbox_test_result(result, tests[i][1])
+        # Tests the batch never reached (a crash or timeout) are retried on their own
+        retried = await asyncio.gather(*(self._run_in_sandbox(*tests[i]) for i in unreported))
+        for i, result in zip(unreported, retried):
+            results[i] = result
+        return results
+
+    def _pytest_env(self) -> Dict[str, str]:
+        env = super()._pytest_env()
+        if self._django_settings:
+            env['DJANGO_SETTINGS_MODULE'] = self._django_settings
         
         python_path = env.get('PYTHONPATH', '').split(os.pathsep)
         project_root = str(self.project_path)
         if project_root not in python_path:
             python_path.insert(0, project_root)
             env['PYTHONPATH'] = os.pathsep.join(filter(None, python_path))
+        return env
 
-        cmd = [
-            sys.executable, '-m', 'pytest', 
-            '--ds', env.get('DJANGO_SETTINGS_MODULE', 'settings'), 
-            str(test_file), '-v'
-        ]
+    def _pytest_options(self) -> List[str]:
+        return ['--ds', self._django_settings or os.environ.get('DJANGO_SETTINGS_MODULE', 'settings')]
 
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.project_path),
-                env=env
-            )
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
-            
-            output = stdout.decode()
-            error = stderr.decode()
-            
-            return TestResult(
-                success=process.returncode == 0,
-                output=output,
-                error=error if process.returncode != 0 else None,
-                duration=time.time() - start_time,
-                test_name=test_name,
-                test_file=str(test_file)
-            )
-        except asyncio.TimeoutError:
-            return TestResult(success=False, error="Test timed out.", duration=time.time() - start_time)
-        finally:
-            if test_file.parent.exists():
-                shutil.rmtree(test_file.parent)
+    async def _run_batch(self, tests: List[Tuple[str, str]]) -> List[TestResult]:
+        if self.use_sandbox and self.sandbox is not None:
+            return await self._run_batch_in_sandbox(tests)
+        return await super()._run_batch(tests)
 
 
-def get_test_runner(project_type: str, project_path: str) -> BaseTestRunner:
+def get_test_runner(project_type: str, project_path: str, use_sandbox: bool = False) -> BaseTestRunner:
     if project_type == "django":
-        return DjangoTestRunner(project_path)
+        return DjangoTestRunner(project_path, use_sandbox=use_sandbox)
     elif project_type == "flask":
         return PytestTestRunner(project_path)
     elif project_type == "node":
@@ -272,12 +575,16 @@ async def run_test_interactive(
     test_code: str,
     project_type: str,
     test_name: str = "generated_test",
-    use_sandbox: bool = True,
+    use_sandbox: bool = False,
     with_coverage: bool = False,
     show_output: bool = True
 ) -> TestResult:
     """Run a test interactively with progress and rich output"""
-    runner = get_test_runner(project_type, project_path)
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.syntax import Syntax
+
+    runner = get_test_runner(project_type, project_path, use_sandbox)
     
     with Progress(
         SpinnerColumn(),
@@ -287,23 +594,23 @@ async def run_test_interactive(
         task = progress.add_task(f"[cyan]Running test '{test_name}'...", total=None)
         
         try:
-            result = await runner.run_test(test_code, test_name, with_coverage)
+            result = await runner.run_test_memoized(test_code, test_name, with_coverage)
             progress.stop()
             
             if result.success:
-                console.print(f"\n[green]✓ PASSED[/green] ({result.duration:.2f}s)")
+                _console().print(f"\n[green]✓ PASSED[/green] ({result.duration:.2f}s)")
             else:
-                console.print(f"\n[red]✗ FAILED[/red] ({result.duration:.2f}s)")
+                _console().print(f"\n[red]✗ FAILED[/red] ({result.duration:.2f}s)")
                 if result.error:
-                    console.print(Panel(result.error, title="Error", border_style="red"))
+                    _console().print(Panel(result.error, title="Error", border_style="red"))
 
             if show_output and result.output:
-                console.print(Panel(Syntax(result.output, "text", theme="monokai"), title="Output"))
+                _console().print(Panel(Syntax(result.output, "text", theme="monokai"), title="Output"))
 
             return result
         except Exception as e:
             progress.stop()
-            console.print(f"[red]Error running test: {str(e)}[/red]")
+            _console().print(f"[red]Error running test: {str(e)}[/red]")
             raise
         finally:
             runner.cleanup()
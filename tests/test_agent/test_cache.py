@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+import importlib.util
+import tempfile
+import time
+
+from agent.cache import ResponseCache, SemanticCache
+
+SEMANTIC_DEPS = all(importlib.util.find_spec(name) for name in ("faiss", "numpy", "sentence_transformers"))
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "llm.sqlite"
+
+    def make_cache(self, **kwargs):
+        cache = ResponseCache(self.db_path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_round_trip(self):
+        cache = self.make_cache()
+        key = ResponseCache.make_key("gemini", "prompt")
+
+        self.assertIsNone(cache.get(key))
+        cache.set(key, "response")
+        self.assertEqual(cache.get(key), "response")
+
+    def test_key_depends_on_model(self):
+        self.assertNotEqual(
+            ResponseCache.make_key("model-a", "prompt"),
+            ResponseCache.make_key("model-b", "prompt"),
+        )
+
+    def test_expired_entry_is_a_miss(self):
+        cache = self.make_cache(ttl=0.01)
+        cache.set("key", "response")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("key"))
+
+    def test_evicts_oldest_entries(self):
+        cache = self.make_cache(max_entries=2)
+        for i in range(3):
+            cache.set(f"key{i}", f"response{i}")
+            time.sleep(0.001)
+
+        self.assertIsNone(cache.get("key0"))
+        self.assertEqual(cache.get("key2"), "response2")
+
+class FakeEncoder:
+    """Fixed embeddings, so tests neither download a model nor depend on its scores."""
+
+    VECTORS = {
+        "create a user": [1.0, 0.0],
+        "create a new user": [0.96, 0.28],
+        "delete a user": [0.6, 0.8],
+    }
+
+    def __init__(self, model_name):
+        pass
+
+    def encode(self, texts, normalize_embeddings=True):
+        return [self.VECTORS[text] for text in texts]
+
+@unittest.skipUnless(SEMANTIC_DEPS, "requires sentence-transformers and faiss-cpu")
+class TestSemanticCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "semantic.sqlite"
+        patcher = patch('sentence_transformers.SentenceTransformer', FakeEncoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_cache(self, **kwargs):
+        cache = SemanticCache(self.db_path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_similar_specification_is_a_hit(self):
+        cache = self.make_cache()
+        cache.add("gemini:", "create a user", "response")
+
+        self.assertEqual(cache.lookup("gemini:", "create a new user"), "response")
+        self.assertEqual(self.make_cache().lookup("gemini:", "create a new user"), "response")
+
+    def test_specification_below_threshold_is_a_miss(self):
+        cache = self.make_cache()
+        cache.add("gemini:", "create a user", "response")
+
+        self.assertIsNone(cache.lookup("gemini:", "delete a user"))
+
+    def test_namespaces_are_isolated(self):
+        cache = self.make_cache()
+        cache.add("gemini:model", "create a user", "response")
+
+        self.assertIsNone(cache.lookup("gemini:view", "create a user"))
+
+    def test_expired_entry_is_a_miss(self):
+        cache = self.make_cache(ttl=0.01)
+        cache.add("gemini:", "create a user", "response")
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.lookup("gemini:", "create a user"))
+        self.assertIsNone(self.make_cache(ttl=0.01).lookup("gemini:", "create a user"))
+
+if __name__ == '__main__':
+    unittest.main()
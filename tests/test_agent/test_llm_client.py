@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
+
+from tenacity import wait_none
+
+from agent import llm_client
+from agent.llm_client import GeminiClient
+
+class FakeStream:
+    """Async-iterable stand-in for a streamed Gemini response."""
+
+    def __init__(self, *texts):
+        self.chunks = [MagicMock(text=text) for text in texts]
+        self.consumed = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        try:
+            for chunk in self.chunks:
+                self.consumed += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+def make_response(text):
+    return FakeStream(text)
+
+class TestGeminiClient(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('agent.llm_client._get_model')
+        self.mock_get_model = patcher.start()
+        self.addCleanup(patcher.stop)
+        wait_patcher = patch.object(GeminiClient.generate.retry, 'wait', wait_none())
+        wait_patcher.start()
+        self.addCleanup(wait_patcher.stop)
+        self.model = MagicMock()
+        self.mock_get_model.return_value = self.model
+        self.client = GeminiClient("fake-key")
+
+    def test_generate_extracts_code_block(self):
+        self.model.generate_content_async = AsyncMock(
+            return_value=make_response("Here you go:\n```python\nassert True\n```\n")
+        )
+
+        result = asyncio.run(self.client.generate("write a test"))
+
+        self.assertEqual(result, "assert True")
+
+    def test_extract_python_code_prefers_python_fences(self):
+        extract = self.client._extract_python_code
+
+        self.assertEqual(extract("no code here"), "")
+        self.assertEqual(extract("```\nplain = 1\n```"), "plain = 1")
+        self.assertEqual(
+            extract("```\nplain = 1\n```\n```python\ntyped = 2\n```"), "typed = 2"
+        )
+
+    def test_generate_stops_streaming_after_code_block(self):
+        stream = FakeStream("Sure:\n```py", "thon\nassert 1 == 1\n", "```\n", "More prose", "that is never read")
+        self.model.generate_content_async = AsyncMock(return_value=stream)
+
+        result = asyncio.run(self.client.generate("write a test"))
+
+        self.assertEqual(result, "assert 1 == 1")
+        self.assertEqual(stream.consumed, 3)
+        self.assertTrue(stream.closed)
+        self.assertEqual(self.model.generate_content_async.call_args.kwargs["stream"], True)
+
+    def test_cache_hit_is_recorded_in_history(self):
+        cache = MagicMock()
+        cache.get.return_value = "```python\nassert True\n```"
+        self.model.generate_content_async = AsyncMock()
+        client = GeminiClient("fake-key", cache=cache)
+
+        result = asyncio.run(client.generate("write a test"))
+
+        self.assertEqual(result, "assert True")
+        self.model.generate_content_async.assert_not_called()
+        self.assertEqual(list(client.conversation_history), [
+            {"prompt": "write a test", "response": "```python\nassert True\n```"}
+        ])
+
+    def test_concurrent_identical_prompts_share_one_request(self):
+        async def slow_generate(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return make_response("```python\nassert True\n```")
+
+        self.model.generate_content_async = AsyncMock(side_effect=slow_generate)
+
+        async def run():
+            return await asyncio.gather(
+                self.client.generate("same prompt"),
+                self.client.generate("same prompt"),
+            )
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, ["assert True", "assert True"])
+        self.assertEqual(self.model.generate_content_async.call_count, 1)
+
+    def test_hung_request_times_out_and_is_retried(self):
+        async def hung_generate(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        self.model.generate_content_async = AsyncMock(side_effect=hung_generate)
+        client = GeminiClient("fake-key", request_timeout=0.01)
+
+        with self.assertRaises(Exception):
+            asyncio.run(client.generate("write a test"))
+        self.assertEqual(self.model.generate_content_async.call_count, 3)
+
+    def test_deterministic_errors_are_not_retried(self):
+        self.model.generate_content_async = AsyncMock(side_effect=ValueError("invalid API key"))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.client.generate("write a test"))
+        self.assertEqual(self.model.generate_content_async.call_count, 1)
+
+    def test_generate_many_preserves_order_and_errors(self):
+        async def fake_generate(prompt, *args, **kwargs):
+            if "boom" in prompt:
+                raise ValueError("boom")
+            return make_response(f"```python\n# {prompt.splitlines()[-1]}\n```")
+
+        self.model.generate_content_async = AsyncMock(side_effect=fake_generate)
+
+        results = asyncio.run(self.client.generate_many(
+            [("first", None), ("boom", None), ("third", None)], concurrency=2
+        ))
+
+        self.assertEqual(results[0], "# first")
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2], "# third")
+
+class TestGetModel(unittest.TestCase):
+
+    @patch('agent.llm_client._configured_api_key', None)
+    @patch('agent.llm_client.genai')
+    def test_switching_keys_reconfigures_every_time(self, mock_genai):
+        for key in ("key-a", "key-b", "key-a", "key-a"):
+            llm_client._get_model(key, "gemini")
+
+        self.assertEqual(
+            [c.kwargs["api_key"] for c in mock_genai.configure.call_args_list], ["key-a", "key-b", "key-a"]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import unittest
+
+from agent.prompts import PromptTemplates, TestContext
+
+
+class TestTestContext(unittest.TestCase):
+
+    def test_to_prompt_context(self):
+        context = TestContext(
+            specification="List items",
+            target_type="endpoint",
+            target_info={"url": "items/", "methods": ["GET"]},
+            codebase_context={"apps": ["shop"]},
+            previous_attempts=[{"error": "boom"}],
+        )
+
+        rendered = context.to_prompt_context()
+
+        self.assertEqual(json.loads(rendered), {
+            "target_type": "endpoint",
+            "target_info": {"url": "items/", "methods": ["GET"]},
+            "previous_attempts": 1,
+            "has_feedback": False,
+        })
+        self.assertIn('\n  "target_type": "endpoint"', rendered)
+
+
+class TestPromptTemplates(unittest.TestCase):
+
+    def test_render_matches_format(self):
+        fields = dict(
+            specification="List items", url_pattern="items/", view_name="ItemView",
+            methods="['GET']", parameters="{}", model_info='{"name": "Item"}',
+            view_code="class ItemView: ...", unused="ignored",
+        )
+        template = PromptTemplates.GENERATE_API_TEST_DJANGO
+
+        self.assertEqual(PromptTemplates.render(template, **fields), template.format(**fields))
+
+    def test_render_falls_back_for_format_specs(self):
+        self.assertEqual(PromptTemplates.render("{count:03d} {{x}}", count=7), "007 {x}")
+
+    def test_render_missing_field_raises(self):
+        with self.assertRaises(KeyError):
+            PromptTemplates.render(PromptTemplates.GENERATE_MODEL_TEST, specification="x")
+
+
+if __name__ == '__main__':
+    unittest.main()
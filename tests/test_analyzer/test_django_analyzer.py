@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from pathlib import Path
 import tempfile
 import os
@@ -43,6 +44,17 @@ class TestDjangoFileScanner(unittest.TestCase):
         self.assertNotIn(random_file, all_files)
         self.assertEqual(len(all_files), 4)
 
+    def test_scan_skips_excluded_directories(self):
+        kept = self.create_mock_file("app1/models.py")
+        self.create_mock_file("venv/lib/site-packages/pkg/models.py")
+        self.create_mock_file(".git/hooks/models.py")
+        self.create_mock_file("app1/__pycache__/models.py")
+
+        scanner = DjangoFileScanner(str(self.project_root))
+        scanner.scan()
+
+        self.assertEqual(scanner.files["models"], [kept])
+
 class TestDjangoAnalyzer(unittest.TestCase):
 
     def setUp(self):
@@ -80,7 +92,9 @@ class TestDjangoAnalyzer(unittest.TestCase):
         )
 
         analyzer = DjangoAnalyzer(str(self.project_root))
-        analyzer.analyze()
+        results = analyzer.analyze()
+
+        self.assertEqual(results["counts"], {"models": 1, "views": 1, "urls": 1, "serializers": 0})
 
         # Check models
         self.assertIn("app1", analyzer.models)
@@ -101,6 +115,95 @@ class TestDjangoAnalyzer(unittest.TestCase):
         self.assertEqual(analyzer.urls["app1"][0]["pattern"], "my-view/")
         self.assertEqual(analyzer.urls["app1"][0]["view"], "views.my_view")
 
+        self.assertEqual(analyzer.compact_context(), {"apps": {"app1": {
+            "models": ["MyModel"],
+            "views": ["my_view"],
+            "urls": ["my-view/ -> views.my_view"],
+        }}})
+
+    def test_analyze_only_records_top_level_definitions(self):
+        self.create_mock_file(
+            "app1/views.py",
+            "class ItemView:\n"
+            "    def get(self, request):\n"
+            "        def helper():\n"
+            "            pass\n"
+        )
+        self.create_mock_file(
+            "app1/urls.py",
+            "from django.urls import path\n"
+            "from . import views\n\n"
+            "urlpatterns = [\n"
+            "    path('items/', views.ItemView),\n"
+            "]\n"
+            "urlpatterns += [path('extra/', views.extra)]\n\n"
+            "def build():\n"
+            "    return [path('ignored/', views.ignored)]\n"
+        )
+
+        analyzer = DjangoAnalyzer(str(self.project_root), use_cache=False)
+        analyzer.analyze()
+
+        self.assertEqual(analyzer.views["app1"], [{"name": "ItemView", "type": "class"}])
+        self.assertEqual(
+            [url["pattern"] for url in analyzer.urls["app1"]], ["items/", "extra/"]
+        )
+
+    def test_analyze_skips_parsing_files_without_markers(self):
+        self.create_mock_file("app1/models.py", "# Create your models here.\n")
+
+        with patch("analyzer.django_analyzer.ast.parse") as mock_parse:
+            analyzer = DjangoAnalyzer(str(self.project_root), use_cache=False)
+            analyzer.analyze()
+            mock_parse.assert_not_called()
+        self.assertEqual(analyzer.models, {"app1": []})
+
+    def test_analyze_reuses_cached_parse_results(self):
+        models_file = self.create_mock_file(
+            "app1/models.py",
+            "from django.db import models\n\n"
+            "class MyModel(models.Model):\n"
+            "    pass\n"
+        )
+        DjangoAnalyzer(str(self.project_root)).analyze()
+
+        with patch("analyzer.django_analyzer.ast.parse") as mock_parse:
+            analyzer = DjangoAnalyzer(str(self.project_root))
+            analyzer.analyze()
+            mock_parse.assert_not_called()
+        self.assertEqual(analyzer.models["app1"][0]["name"], "MyModel")
+        self.assertEqual((self.project_root / ".agent_cache" / ".gitignore").read_text().splitlines()[-1], "*")
+
+        # Changing the file invalidates its cache entry
+        models_file.write_text(
+            "from django.db import models\n\n"
+            "class OtherModel(models.Model):\n"
+            "    name = models.CharField(max_length=10)\n"
+        )
+        analyzer = DjangoAnalyzer(str(self.project_root))
+        analyzer.analyze()
+        self.assertEqual(analyzer.models["app1"][0]["name"], "OtherModel")
+
+    @patch.object(DjangoAnalyzer, "PARALLEL_THRESHOLD", 1)
+    def test_analyze_parallel_matches_serial(self):
+        for i in range(3):
+            self.create_mock_file(
+                f"app{i}/models.py",
+                "from django.db import models\n\n"
+                f"class Model{i}(models.Model):\n"
+                "    pass\n"
+            )
+        self.create_mock_file("app0/views.py", "def broken(:\n")
+
+        parallel = DjangoAnalyzer(str(self.project_root), use_cache=False, max_workers=2)
+        parallel.analyze()
+        serial = DjangoAnalyzer(str(self.project_root), use_cache=False, max_workers=1)
+        serial.analyze()
+
+        self.assertEqual(parallel.models, serial.models)
+        self.assertEqual(parallel.models["app2"][0]["name"], "Model2")
+        self.assertNotIn("app0", parallel.views)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from pathlib import Path
 import tempfile
 
@@ -45,5 +46,46 @@ class TestFlaskAnalyzer(unittest.TestCase):
         self.assertEqual(analyzer.routes[1]['path'], '/users/<user_id>')
         self.assertEqual(analyzer.routes[1]['function'], 'user_profile')
 
+        self.assertEqual(analyzer.compact_context(), {"routes": [
+            "GET / -> home",
+            "GET,POST /users/<user_id> -> user_profile",
+        ]})
+
+    def test_analyze_finds_routes_in_app_factory(self):
+        self.create_mock_file(
+            "app.py",
+            "from flask import Flask\n\n"
+            "def create_app():\n"
+            "    app = Flask(__name__)\n\n"
+            "    @app.route('/health')\n"
+            "    def health():\n"
+            "        return 'ok'\n\n"
+            "    return app\n"
+        )
+
+        analyzer = FlaskAnalyzer(str(self.project_root), use_cache=False)
+        analyzer.analyze()
+
+        self.assertEqual(
+            analyzer.routes, [{"path": "/health", "function": "health", "methods": ["GET"]}]
+        )
+
+    def test_analyze_reuses_cached_routes(self):
+        self.create_mock_file(
+            "app.py",
+            "from flask import Flask\n\n"
+            "app = Flask(__name__)\n\n"
+            "@app.route('/')\n"
+            "def home():\n"
+            "    return 'Hello, World!'\n"
+        )
+        FlaskAnalyzer(str(self.project_root)).analyze()
+
+        with patch("analyzer.flask_analyzer.ast.parse") as mock_parse:
+            analyzer = FlaskAnalyzer(str(self.project_root))
+            analyzer.analyze()
+            mock_parse.assert_not_called()
+        self.assertEqual(analyzer.routes[0]['function'], 'home')
+
 if __name__ == '__main__':
     unittest.main()
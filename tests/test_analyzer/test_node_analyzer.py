@@ -1,5 +1,6 @@
 
 import unittest
+from unittest.mock import patch
 from pathlib import Path
 import tempfile
 
@@ -23,5 +24,51 @@ class TestNodeAnalyzer(unittest.TestCase):
         # For now, we just check that it runs without error
         self.assertEqual(analyzer.routes, [])
 
+    def test_analyze_reads_app_file_from_package_json(self):
+        (self.project_root / "package.json").write_text('{"main": "server.js"}')
+
+        analyzer = NodeAnalyzer(str(self.project_root))
+        results = analyzer.analyze()
+
+        self.assertEqual(results["app_file"], "server.js")
+
+    def test_analyze_skips_node_modules(self):
+        app = self.project_root / "src" / "app.js"
+        app.parent.mkdir(parents=True)
+        app.write_text("app.get('/items', (req, res) => res.send([]));\n")
+        vendored = self.project_root / "node_modules" / "lib" / "index.js"
+        vendored.parent.mkdir(parents=True)
+        vendored.write_text("router.post('/vendored', handler);\n")
+
+        analyzer = NodeAnalyzer(str(self.project_root))
+        analyzer.analyze()
+
+        self.assertEqual([route["path"] for route in analyzer.routes], ["/items"])
+
+    @patch.object(NodeAnalyzer, "PARALLEL_THRESHOLD", 1)
+    def test_analyze_parallel_matches_serial(self):
+        for i in range(3):
+            (self.project_root / f"routes{i}.js").write_text(
+                f"router.get('/items/{i}', handler);\n"
+            )
+
+        parallel = NodeAnalyzer(str(self.project_root), use_cache=False, max_workers=2)
+        parallel.analyze()
+        serial = NodeAnalyzer(str(self.project_root), use_cache=False, max_workers=1)
+        serial.analyze()
+
+        self.assertEqual(parallel.routes, serial.routes)
+        self.assertEqual(len(parallel.routes), 3)
+
+    def test_analyze_reuses_cached_routes(self):
+        (self.project_root / "app.js").write_text("app.get('/items', handler);\n")
+        NodeAnalyzer(str(self.project_root)).analyze()
+
+        with patch("analyzer.node_analyzer.ROUTE_RE") as mock_re:
+            analyzer = NodeAnalyzer(str(self.project_root))
+            analyzer.analyze()
+            mock_re.finditer.assert_not_called()
+        self.assertEqual([route["path"] for route in analyzer.routes], ["/items"])
+
 if __name__ == '__main__':
     unittest.main()
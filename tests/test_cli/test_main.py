@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pathlib import Path
+import asyncio
+import tempfile
+
+from click.testing import CliRunner
+
+from cli.main import _render_code, batch, batch_generate, build_prompt, console, detect_project_type
+
+class TestDetectProjectType(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.project_root = Path(self.tmpdir.name)
+
+    def create_mock_file(self, path_str, content=""):
+        path = self.project_root / path_str
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def test_detects_marker_files(self):
+        self.create_mock_file("manage.py")
+        self.assertEqual(detect_project_type(str(self.project_root)), "django")
+
+    def test_detects_flask_import(self):
+        self.create_mock_file("src/app.py", "import os\nfrom flask import Flask\n")
+        self.assertEqual(detect_project_type(str(self.project_root)), "flask")
+
+    def test_ignores_flask_imports_in_skipped_or_deep_directories(self):
+        self.create_mock_file("venv/app.py", "from flask import Flask\n")
+        self.create_mock_file("a/b/c/app.py", "from flask import Flask\n")
+        self.assertEqual(detect_project_type(str(self.project_root)), "unknown")
+
+class TestBatchGenerate(unittest.TestCase):
+
+    def test_build_prompt_uses_first_route(self):
+        results = {"routes": [{"path": "/users", "function": "list_users", "methods": ["GET"]}]}
+
+        prompt = build_prompt("lists users", "flask", results)
+
+        self.assertIn("lists users", prompt)
+        self.assertIn("- Path: /users", prompt)
+        self.assertEqual(build_prompt("x", "rails", results), "")
+
+    def test_batch_generate_sends_one_prompt_per_spec(self):
+        client = MagicMock()
+        client.generate_many = AsyncMock(return_value=["code a", "code b"])
+        results = {"routes": [], "app_file": "server.js"}
+
+        generated = asyncio.run(
+            batch_generate(client, ["spec a", "spec b"], "node", results, concurrency=2)
+        )
+
+        self.assertEqual(generated, ["code a", "code b"])
+        items = client.generate_many.call_args.args[0]
+        self.assertEqual([context for _, context in items], [{"specification": "spec a"}, {"specification": "spec b"}])
+        self.assertIn("spec b", items[1][0])
+        self.assertEqual(client.generate_many.call_args.kwargs, {"concurrency": 2})
+
+    def test_batch_generate_never_sends_empty_prompts(self):
+        client = MagicMock()
+        client.generate_many = AsyncMock()
+
+        generated = asyncio.run(batch_generate(client, ["spec a"], "rails", {}))
+
+        client.generate_many.assert_not_called()
+        self.assertIsInstance(generated[0], ValueError)
+
+    @patch.dict('os.environ', {"GEMINI_API_KEY": "fake-key"})
+    @patch('cli.main._create_client')
+    @patch('cli.main._create_analyzer')
+    def test_batch_reports_analysis_errors_before_generating(self, mock_create_analyzer, mock_create_client):
+        mock_create_analyzer.return_value.analyze.return_value = {"error": "No URL files found"}
+
+        result = CliRunner().invoke(batch, ["--path", ".", "--specs", "-"], input="spec a\n")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("No URL files found", result.output)
+        mock_create_client.assert_not_called()
+
+
+class TestRenderCode(unittest.TestCase):
+
+    def test_rendered_code_prints_repeatedly(self):
+        rendered = _render_code("x = 1\n", "python")
+
+        with console.capture() as first:
+            console.print(rendered)
+        with console.capture() as second:
+            console.print(rendered)
+
+        self.assertIn("x = 1", first.get())
+        self.assertEqual(first.get(), second.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
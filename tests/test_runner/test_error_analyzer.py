@@ -0,0 +1,61 @@
+import unittest
+
+from runner.error_analyzer import TestErrorAnalyzer, _code_attributes
+
+class TestTestErrorAnalyzer(unittest.TestCase):
+
+    def test_import_error(self):
+        output = "E   ModuleNotFoundError: No module named 'factory'\n"
+
+        analysis = TestErrorAnalyzer("import factory\n", output).analyze()
+
+        self.assertEqual(analysis.error_type, "import_error")
+        self.assertEqual(analysis.error_message, "Missing module: factory")
+
+    def test_attribute_error_suggests_similar_names(self):
+        code = "def test_user(user):\n    assert user.username\n"
+        output = "E   AttributeError: 'User' object has no attribute 'usernme'\n"
+
+        analysis = TestErrorAnalyzer(code, output).analyze()
+
+        self.assertEqual(analysis.error_type, "attribute_error")
+        self.assertIn("Did you mean: username?", analysis.suggested_fix)
+
+    def test_attribute_extraction_is_cached_per_source(self):
+        code = "def test_user(user):\n    assert user.profile.username\n"
+
+        first = TestErrorAnalyzer(code, "")._find_attributes_in_code()
+        hits = _code_attributes.cache_info().hits
+        second = TestErrorAnalyzer(code, "")._find_attributes_in_code()
+
+        self.assertEqual(sorted(first), ["profile", "username"])
+        self.assertEqual(second, first)
+        self.assertEqual(_code_attributes.cache_info().hits, hits + 1)
+        self.assertEqual(TestErrorAnalyzer("def broken(:\n", "")._find_attributes_in_code(), [])
+
+    def test_pattern_priority_does_not_depend_on_position(self):
+        output = (
+            "E   AssertionError: assert 1 == 2\n"
+            "E   ModuleNotFoundError: No module named 'factory'\n"
+        )
+
+        analysis = TestErrorAnalyzer("", output).analyze()
+
+        self.assertEqual(analysis.error_type, "import_error")
+
+    def test_error_kind_without_handler_falls_back_to_generic(self):
+        analysis = TestErrorAnalyzer("", "TypeError: unsupported operand\n").analyze()
+
+        self.assertEqual(analysis.error_type, "unknown_error")
+        self.assertEqual(analysis.error_message, "TypeError: unsupported operand")
+
+    def test_generic_analysis_uses_last_unindented_line(self):
+        output = "Traceback (most recent call last):\n    frame\nRuntimeError: boom\n    detail\n"
+
+        analysis = TestErrorAnalyzer("", output).analyze()
+
+        self.assertEqual(analysis.error_type, "unknown_error")
+        self.assertEqual(analysis.error_message, "RuntimeError: boom")
+
+if __name__ == '__main__':
+    unittest.main()
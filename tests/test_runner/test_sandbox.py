@@ -2,9 +2,21 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
+import io
+import tarfile
 import tempfile
+import threading
+import asyncio
+import os
 
-from runner.sandbox import DockerSandbox, SandboxConfig
+from runner.sandbox import (
+    DockerSandbox,
+    SandboxConfig,
+    TAR_COPY_BUFSIZE,
+    _SendfileTarFile,
+    close_shared_sandboxes,
+    get_shared_sandbox,
+)
 
 class TestDockerSandbox(unittest.TestCase):
 
@@ -13,6 +25,10 @@ class TestDockerSandbox(unittest.TestCase):
         self.addCleanup(self.tmpdir.cleanup)
         self.project_root = Path(self.tmpdir.name)
         (self.project_root / "manage.py").touch()
+        # Each test patches docker, so none may see another test's shared client
+        client_patcher = patch('runner.sandbox._docker_client', None)
+        client_patcher.start()
+        self.addCleanup(client_patcher.stop)
 
     @patch('runner.sandbox.docker')
     def test_create_container_security_features(self, mock_docker):
@@ -33,7 +49,301 @@ class TestDockerSandbox(unittest.TestCase):
         self.assertTrue(kwargs['network_disabled'])
         self.assertTrue(kwargs['read_only'])
         self.assertIn('/tmp', kwargs['tmpfs'])
-        self.assertEqual(kwargs['volumes'][str(self.project_root)]['mode'], 'ro')
+        # The project is copied into the image rather than mounted from the host
+        self.assertNotIn('volumes', kwargs)
+
+    @patch('runner.sandbox.docker')
+    def test_tests_reuse_one_persistent_container(self, mock_docker):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        container = mock_client.containers.create.return_value
+        mock_client.api.exec_create.return_value = {"Id": "exec"}
+        mock_client.api.exec_start.side_effect = lambda *a, **k: iter([b"O", b"K"])
+        mock_client.api.exec_inspect.return_value = {"ExitCode": 0}
+        container.stats.return_value = {}
+
+        sandbox = DockerSandbox(str(self.project_root))
+        first = sandbox.run_test_in_sandbox("assert True", "test_one")
+        second = sandbox.run_test_in_sandbox("assert True", "test_two")
+
+        self.assertTrue(first.success)
+        self.assertEqual(second.output, "OK")
+        mock_client.containers.create.assert_called_once()
+        self.assertEqual(mock_client.containers.create.call_args.kwargs['command'], ["sleep", "infinity"])
+        self.assertEqual(container.put_archive.call_count, 2)
+        # Each test is one pytest exec followed by one exec removing its module
+        self.assertEqual(mock_client.api.exec_start.call_count, 4)
+        run_call, cleanup_call = mock_client.api.exec_create.call_args_list[2:]
+        command = run_call.args[1]
+        self.assertEqual(command[2:5], ["python", "-m", "pytest"])
+        self.assertRegex(command[5], r"^/tmp/tests/test_two_\w+\.py$")
+        self.assertIn("no:cacheprovider", command)
+        self.assertEqual(run_call.kwargs["environment"]["PYTHONPATH"], "/app")
+        self.assertEqual(cleanup_call.args[1], ["rm", "-f", command[5]])
+        container.remove.assert_not_called()
+        container.stats.assert_called_with(stream=False, one_shot=True)
+
+        sandbox.close()
+        container.remove.assert_called_once_with(force=True)
+
+    @patch('runner.sandbox.docker')
+    def test_batch_runs_in_one_exec_and_reads_back_per_module_outcomes(self, mock_docker):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        container = mock_client.containers.create.return_value
+        mock_client.api.exec_create.return_value = {"Id": "exec"}
+        mock_client.api.exec_start.return_value = iter([b"1 passed"])
+        mock_client.api.exec_inspect.return_value = {"ExitCode": 124}
+        uploaded = {}
+
+        def put_archive(path, data):
+            with tarfile.open(fileobj=io.BytesIO(data), mode='r:') as tar:
+                uploaded.update((name, tar.extractfile(name).read()) for name in tar.getnames())
+
+        def get_archive(path):
+            # The batch timed out after its first module
+            first = next(name for name in uploaded if name.startswith("tests/"))[len("tests/"):-len(".py")]
+            report = (
+                f'<testsuites><testsuite><testcase classname="tests.{first}" name="test_ok"/>'
+                '</testsuite></testsuites>'
+            ).encode()
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode='w') as tar:
+                DockerSandbox._add_bytes(tar, path.rsplit("/", 1)[1], report)
+            return iter([buffer.getvalue()]), {}
+
+        container.put_archive.side_effect = put_archive
+        container.get_archive.side_effect = get_archive
+        sandbox = DockerSandbox(str(self.project_root), SandboxConfig(timeout=30))
+
+        results = sandbox.run_tests_in_sandbox([("assert True", "test_one"), ("assert True", "test_two")])
+
+        self.assertEqual((results[0].success, results[0].output), (True, "1 passed"))
+        self.assertIsNone(results[1])
+        self.assertEqual(mock_client.api.exec_create.call_count, 2)
+        run_call, cleanup_call = mock_client.api.exec_create.call_args_list
+        command = run_call.args[1]
+        self.assertEqual(command[:2], ["timeout", "60"])
+        self.assertEqual(command[2:5], ["python", "-m", "pytest"])
+        report = next(arg for arg in command if arg.startswith("--junitxml="))[len("--junitxml="):]
+        self.assertEqual(sum(name.startswith("tests/") for name in uploaded), 2)
+        # The batch's modules and report are removed from the container's /tmp
+        self.assertEqual(cleanup_call.args[1][:2], ["rm", "-f"])
+        self.assertEqual(set(cleanup_call.args[1][2:]), {*command[5:7], report})
+
+    @patch('runner.sandbox.docker')
+    def test_prepare_test_archive_is_uncompressed_tar(self, mock_docker):
+        sandbox = DockerSandbox(str(self.project_root))
+
+        archive = sandbox._prepare_test_archive("assert True", "test_one")
+
+        with tarfile.open(fileobj=io.BytesIO(archive), mode='r:') as tar:
+            self.assertEqual(tar.getnames(), ["tests/test_one.py"])
+            self.assertIn(b"assert True", tar.extractfile("tests/test_one.py").read())
+
+    @patch('runner.sandbox.docker')
+    def test_add_project_files_uses_large_copy_buffer(self, mock_docker):
+        (self.project_root / "app").mkdir()
+        (self.project_root / "app" / "models.py").write_text("x = 1\n")
+        (self.project_root / "app" / "__pycache__").mkdir()
+        (self.project_root / "app" / "__pycache__" / "models.cpython-311.pyc").write_bytes(b"")
+        (self.project_root / ".git").mkdir()
+        (self.project_root / ".git" / "config").write_text("[core]\n")
+        sandbox = DockerSandbox(str(self.project_root))
+        buffer = io.BytesIO()
+
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            sandbox._add_project_files(tar)
+            self.assertEqual(tar.copybufsize, TAR_COPY_BUFSIZE)
+
+        with tarfile.open(fileobj=io.BytesIO(buffer.getvalue()), mode='r:') as tar:
+            self.assertEqual(sorted(tar.getnames()), ["app/models.py", "manage.py"])
+
+    @patch('runner.sandbox.docker')
+    def test_project_image_is_built_once_per_project_state(self, mock_docker):
+        mock_docker.errors.ImageNotFound = type("ImageNotFound", (Exception,), {})
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        mock_client.images.get.side_effect = mock_docker.errors.ImageNotFound
+        sandbox = DockerSandbox(str(self.project_root))
+
+        contexts = []
+        mock_client.images.build.side_effect = lambda **kwargs: contexts.append(kwargs['fileobj'].read())
+
+        tag = sandbox._ensure_project_image()
+
+        kwargs = mock_client.images.build.call_args.kwargs
+        self.assertEqual(kwargs['tag'], tag)
+        self.assertTrue(kwargs['custom_context'])
+        with tarfile.open(fileobj=io.BytesIO(contexts[0]), mode='r:') as tar:
+            self.assertEqual(
+                sorted(tar.getnames()), [".sandbox-requirements.txt", ".sandbox.Dockerfile", "manage.py"]
+            )
+            dockerfile = tar.extractfile(".sandbox.Dockerfile").read().decode()
+        self.assertEqual(dockerfile.count("pip install"), 1)
+        # The single pip run comes before the project copy, so source edits keep its layer
+        self.assertLess(dockerfile.index("pip install"), dockerfile.index("COPY . /app"))
+        self.assertEqual(sandbox._ensure_project_image(), tag)
+
+        (self.project_root / "models.py").write_text("x = 1\n")
+        self.assertNotEqual(sandbox._ensure_project_image(), tag)
+
+    def test_sendfile_tar_matches_plain_tar(self):
+        payload = os.urandom(3 * tarfile.BLOCKSIZE + 7)
+        (self.project_root / "dump.bin").write_bytes(payload)
+        (self.project_root / "manage.py").write_text("x = 1\n")
+
+        with tempfile.TemporaryFile() as archive:
+            with patch('runner.sandbox.os.sendfile', wraps=os.sendfile) as sendfile:
+                with _SendfileTarFile.open(fileobj=archive, mode='w') as tar:
+                    tar.add(self.project_root / "dump.bin", arcname="dump.bin")
+                    DockerSandbox._add_bytes(tar, "inline.txt", b"inline")
+                    tar.add(self.project_root / "manage.py", arcname="manage.py")
+            self.assertEqual(sendfile.call_count, 2)
+
+            archive.seek(0)
+            with tarfile.open(fileobj=archive, mode='r:') as tar:
+                self.assertEqual(tar.getnames(), ["dump.bin", "inline.txt", "manage.py"])
+                self.assertEqual(tar.extractfile("dump.bin").read(), payload)
+                self.assertEqual(tar.extractfile("inline.txt").read(), b"inline")
+                self.assertEqual(tar.extractfile("manage.py").read(), b"x = 1\n")
+
+    @patch('runner.sandbox.docker')
+    def test_prepare_test_content_hoists_only_module_level_imports(self, mock_docker):
+        sandbox = DockerSandbox(str(self.project_root), SandboxConfig(django_settings="mysite.settings"))
+        code = (
+            "from app.models import (\n"
+            "    User,\n"
+            ")\n"
+            "def test_user():\n"
+            "    import json\n"
+            "    assert User\n"
+        )
+
+        content = sandbox._prepare_test_content(code)
+
+        self.assertTrue(content.startswith("from app.models import (\n    User,\n)\n"))
+        self.assertIn("'mysite.settings'", content)
+        self.assertTrue(content.endswith("def test_user():\n    import json\n    assert User\n"))
+        compile(content, "test", "exec")
+
+    def test_collect_output_decodes_split_characters_and_keeps_tail(self):
+        chunks = [b"caf", b"\xc3", b"\xa9 ", b"x" * 10, b" FAILED"]
+
+        self.assertEqual(DockerSandbox._collect_output(iter(chunks)), "café " + "x" * 10 + " FAILED")
+        self.assertEqual(DockerSandbox._collect_output(iter(chunks), limit=8), "x FAILED")
+
+    @patch('runner.sandbox.docker')
+    def test_sandboxes_share_one_docker_client(self, mock_docker):
+        first = DockerSandbox(str(self.project_root))
+        second = DockerSandbox(str(self.project_root))
+
+        self.assertIs(first.client, second.client)
+        mock_docker.from_env.assert_called_once()
+        first.client.ping.assert_called_once()
+
+    @patch('runner.sandbox.docker')
+    def test_run_test_async_uses_the_sandbox_executor(self, mock_docker):
+        sandbox = DockerSandbox(str(self.project_root))
+        threads = []
+
+        def fake_run(test_code, test_name):
+            threads.append(threading.current_thread().name)
+            return test_name
+
+        sandbox.run_test_in_sandbox = fake_run
+
+        self.assertEqual(asyncio.run(sandbox.run_test_async("assert True", "test_one")), "test_one")
+        self.assertTrue(threads[0].startswith("sandbox"))
+
+    @patch('runner.sandbox.docker')
+    def test_warm_up_starts_the_container_used_by_tests(self, mock_docker):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        sandbox = DockerSandbox(str(self.project_root))
+
+        sandbox.warm_up().join()
+
+        container = mock_client.containers.create.return_value
+        container.start.assert_called_once()
+        self.assertIs(sandbox.start_persistent(), container)
+        mock_client.containers.create.assert_called_once()
+
+    @patch('runner.sandbox.DockerSandbox.validate_docker_setup', return_value=(True, ""))
+    @patch('runner.sandbox._shared_sandboxes', {})
+    @patch('runner.sandbox.docker')
+    def test_shared_sandbox_outlives_runners_until_closed_once(self, mock_docker, mock_validate):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        config = SandboxConfig(django_settings="settings")
+
+        first = get_shared_sandbox(self.project_root, config)
+        first.start_persistent()
+        second = get_shared_sandbox(str(self.project_root), config)
+
+        self.assertIs(first, second)
+        mock_validate.assert_called_once()
+        mock_client.containers.create.assert_called_once()
+        container = mock_client.containers.create.return_value
+        container.remove.assert_not_called()
+
+        close_shared_sandboxes()
+        container.remove.assert_called_once_with(force=True)
+
+    @patch('runner.sandbox.DockerSandbox.validate_docker_setup', return_value=(True, ""))
+    @patch('runner.sandbox._shared_sandboxes', {})
+    @patch('runner.sandbox.docker')
+    def test_shared_sandbox_is_replaced_only_when_project_changes(self, mock_docker, mock_validate):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        config = SandboxConfig(django_settings="settings")
+
+        first = get_shared_sandbox(self.project_root, config)
+        first.start_persistent()
+        first_tag = first._project_image
+        self.assertIs(get_shared_sandbox(self.project_root, config), first)
+        (self.project_root / "models.py").write_text("class User: pass\n")
+        second = get_shared_sandbox(self.project_root, config)
+
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.fingerprint, first.fingerprint)
+        mock_validate.assert_called_once()
+        mock_client.images.remove.assert_called_once_with(first_tag, noprune=True)
+        close_shared_sandboxes()
+
+    @patch('runner.sandbox.docker')
+    def test_retire_waits_for_runs_in_flight_and_closed_sandbox_never_restarts(self, mock_docker):
+        mock_client = MagicMock()
+        mock_docker.from_env.return_value = mock_client
+        sandbox = DockerSandbox(str(self.project_root))
+        container = sandbox.start_persistent()
+
+        with sandbox._in_use():
+            sandbox.retire()
+            container.remove.assert_not_called()
+        container.remove.assert_called_once_with(force=True)
+        mock_client.images.remove.assert_called_once()
+
+        with self.assertRaises(RuntimeError):
+            sandbox.start_persistent()
+        self.assertFalse(sandbox.run_test_in_sandbox("assert True", "test_one").success)
+        mock_client.containers.create.assert_called_once()
+
+    @patch('runner.sandbox.docker')
+    def test_read_cgroup_stats_v2_and_missing(self, mock_docker):
+        sandbox = DockerSandbox(str(self.project_root))
+        sandbox.CGROUP_ROOT = str(self.project_root)
+        base = self.project_root / "system.slice" / "docker-abc.scope"
+        base.mkdir(parents=True)
+        (base / "memory.current").write_text("4096\n")
+        (base / "memory.max").write_text("268435456\n")
+        (base / "cpu.stat").write_text("usage_usec 250\nuser_usec 200\n")
+
+        self.assertEqual(
+            sandbox._read_cgroup_stats("abc"),
+            {'memory_usage': 4096, 'memory_limit': 268435456, 'cpu_usage': 250000},
+        )
+        self.assertIsNone(sandbox._read_cgroup_stats("other"))
 
 if __name__ == '__main__':
     unittest.main()
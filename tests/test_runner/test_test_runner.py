@@ -4,8 +4,11 @@ from pathlib import Path
 import tempfile
 import asyncio
 import os
+import sys
+from collections import OrderedDict
 
-from runner.test_runner import DjangoTestRunner, TestResult
+from runner.sandbox import SandboxResult
+from runner.test_runner import DjangoTestRunner, NodeTestRunner, get_test_runner, PytestTestRunner, TestResult, _communicate_tail, _safe_test_name, _xdist_available
 
 class TestTestRunner(unittest.TestCase):
 
@@ -24,6 +27,273 @@ class TestTestRunner(unittest.TestCase):
         # Test invalid code
         self.assertIsNotNone(runner.validate_test("import os\nprint 'hello'"))
 
+    def test_create_test_file_writes_utf8(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+
+        test_file = runner._create_test_file("assert 'café'\n", "unicode", ".py")
+
+        self.assertEqual(test_file.read_bytes(), "assert 'café'\n".encode("utf-8"))
+        self.assertEqual(test_file.name, "test_unicode.py")
+
+    def test_create_test_file_uses_a_fresh_directory_per_run(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+
+        first = runner._create_test_file("assert True\n", "same name", ".py")
+        second = runner._create_test_file("assert True\n", "same name", ".py")
+
+        self.assertNotEqual(first.parent, second.parent)
+        self.assertEqual(first.parent.parent, runner.temp_dir)
+        self.assertEqual(first.name, "test_same_name.py")
+
+    def test_released_workspaces_are_reused(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+
+        first = runner._create_test_file("assert True\n", "first", ".py")
+        runner._release_test_file(first)
+        second = runner._create_test_file("assert True\n", "second", ".py")
+
+        self.assertFalse(first.exists())
+        self.assertEqual(second.parent, first.parent)
+        self.assertEqual(second.name, "test_second.py")
+
+    def test_run_tests_batch_maps_outcomes_to_each_test(self):
+        runner = PytestTestRunner(str(self.project_root))
+        tests = [
+            ("def test_ok():\n    assert True\n", "passes"),
+            ("def test_bad():\n    assert 1 == 2\n", "fails"),
+            ("def test_broken(:\n", "passes"),
+        ]
+
+        results = asyncio.run(runner.run_tests_batch(tests))
+
+        self.assertEqual([r.test_name for r in results], ["passes", "fails", "passes"])
+        self.assertEqual([r.success for r in results], [True, False, False])
+        self.assertIn("assert 1 == 2", results[1].error)
+        self.assertEqual(list(runner.temp_dir.iterdir()), [])
+
+    @patch('runner.test_runner.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_syntax_errors_fail_before_starting_pytest(self, mock_exec):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+
+        result = asyncio.run(runner.run_test("def test_x(:\n", "broken"))
+
+        self.assertFalse(result.success)
+        self.assertIn("Syntax error", result.error)
+        mock_exec.assert_not_called()
+
+    @patch('runner.test_runner._result_cache', new_callable=OrderedDict)
+    def test_run_test_memoized_reuses_passing_results_until_project_changes(self, _):
+        runner = PytestTestRunner(str(self.project_root))
+        runner.run_test = AsyncMock(side_effect=[
+            TestResult(success=True, output="1 passed"),
+            TestResult(success=True, output="1 passed"),
+            TestResult(success=False, output="1 failed"),
+            TestResult(success=False, output="1 failed"),
+        ])
+
+        first = asyncio.run(runner.run_test_memoized("assert True", "a"))
+        second = asyncio.run(runner.run_test_memoized("assert True", "b"))
+        self.assertEqual(runner.run_test.await_count, 1)
+        self.assertEqual((first.output, second.test_name), ("1 passed", "b"))
+
+        (self.project_root / "models.py").write_text("x = 1\n")
+        asyncio.run(runner.run_test_memoized("assert True", "c"))
+        self.assertEqual(runner.run_test.await_count, 2)
+
+        asyncio.run(runner.run_test_memoized("assert False", "d"))
+        asyncio.run(runner.run_test_memoized("assert False", "d"))
+        self.assertEqual(runner.run_test.await_count, 4)
+
+    @patch('runner.test_runner.importlib.util.find_spec', return_value=None)
+    def test_xdist_probe_runs_once(self, mock_find_spec):
+        _xdist_available.cache_clear()
+        self.addCleanup(_xdist_available.cache_clear)
+
+        self.assertFalse(_xdist_available())
+        self.assertFalse(_xdist_available())
+        mock_find_spec.assert_called_once_with("xdist")
+
+    def test_default_batch_runs_tests_concurrently_up_to_max_workers(self):
+        runner = NodeTestRunner(str(self.project_root))
+        runner.MAX_WORKERS = 2
+        running = []
+        peak = 0
+
+        async def fake_run_test(test_code, test_name, with_coverage=False):
+            nonlocal peak
+            running.append(test_name)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.remove(test_name)
+            return TestResult(success=True, output=test_code, test_name=test_name)
+
+        runner.run_test = fake_run_test
+        tests = [(f"code {i}", f"t{i}") for i in range(5)]
+
+        results = asyncio.run(runner.run_tests_batch(tests))
+
+        self.assertEqual([r.test_name for r in results], ["t0", "t1", "t2", "t3", "t4"])
+        self.assertEqual(peak, 2)
+
+    def test_default_batch_follows_max_workers_changes_mid_run(self):
+        runner = NodeTestRunner(str(self.project_root))
+        runner.MAX_WORKERS = 3
+        running = []
+        peaks = []
+
+        async def fake_run_test(test_code, test_name, with_coverage=False):
+            running.append(test_name)
+            peaks.append(len(running))
+            if test_name == "t0":
+                runner.MAX_WORKERS = 1
+            await asyncio.sleep(0.01)
+            running.remove(test_name)
+            return TestResult(success=True, output="", test_name=test_name)
+
+        runner.run_test = fake_run_test
+
+        results = asyncio.run(runner.run_tests_batch([(f"code {i}", f"t{i}") for i in range(6)]))
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(peaks[:3], [1, 2, 3])
+        self.assertEqual(peaks[3:], [1, 1, 1])
+
+    def test_batch_runs_identical_code_once(self):
+        runner = NodeTestRunner(str(self.project_root))
+        runner.run_test = AsyncMock(side_effect=lambda code, name: TestResult(success=True, output=code, test_name=name))
+
+        results = asyncio.run(runner.run_tests_batch([("a", "first"), ("b", "second"), ("a", "again")]))
+
+        self.assertEqual(runner.run_test.await_count, 2)
+        self.assertEqual([(r.output, r.test_name) for r in results], [("a", "first"), ("b", "second"), ("a", "again")])
+
+    @patch('runner.test_runner.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    @patch('runner.test_runner._communicate_tail')
+    def test_node_timeout_returns_failed_result(self, mock_communicate, mock_exec):
+        async def never_finishes(process):
+            await asyncio.sleep(10)
+
+        mock_communicate.side_effect = never_finishes
+        runner = NodeTestRunner(str(self.project_root), timeout=0.01)
+
+        result = asyncio.run(runner.run_test("test('x', () => {})", "slow"))
+
+        self.assertFalse(result.success)
+        self.assertEqual((result.output, result.error, result.test_name), ("", "Test timed out.", "slow"))
+
+    def test_default_batch_turns_exceptions_into_failed_results(self):
+        runner = NodeTestRunner(str(self.project_root))
+
+        async def fake_run_test(test_code, test_name, with_coverage=False):
+            if test_name == "bad":
+                raise RuntimeError("npx crashed")
+            return TestResult(success=True, output="", test_name=test_name)
+
+        runner.run_test = fake_run_test
+
+        results = asyncio.run(runner.run_tests_batch([("a", "good"), ("b", "bad")]))
+
+        self.assertTrue(results[0].success)
+        self.assertFalse(results[1].success)
+        self.assertEqual((results[1].test_name, results[1].error), ("bad", "npx crashed"))
+
+    def test_communicate_tail_keeps_last_bytes_of_each_stream(self):
+        async def run():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-c',
+                "import sys; sys.stdout.write('x' * 200000 + 'END'); sys.stderr.write('warn')",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            return await _communicate_tail(process, limit=10), process.returncode
+
+        (stdout, stderr), returncode = asyncio.run(run())
+
+        self.assertEqual(stdout, b"xxxxxxxEND")
+        self.assertEqual(stderr, b"warn")
+        self.assertEqual(returncode, 0)
+
+    def test_safe_test_name(self):
+        self.assertEqual(_safe_test_name("create user/login-flow!"), "create_user_login_flow")
+        self.assertEqual(_safe_test_name("crée «item»"), "crée__item")
+
+    @patch('runner.test_runner.DjangoTestRunner._init_sandbox')
+    def test_django_runs_locally_unless_sandbox_requested(self, mock_init_sandbox):
+        runner = get_test_runner("django", str(self.project_root))
+
+        self.assertFalse(runner.use_sandbox)
+        mock_init_sandbox.assert_not_called()
+
+        get_test_runner("django", str(self.project_root), use_sandbox=True)
+        mock_init_sandbox.assert_called_once()
+
+    def test_run_test_uses_sandbox_when_enabled(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+        runner.use_sandbox = True
+        runner.sandbox = MagicMock()
+        runner.sandbox.run_test_async = AsyncMock(
+            return_value=SandboxResult(success=False, output="FAILED", exit_code=1, duration=0.5)
+        )
+
+        result = asyncio.run(runner.run_test("assert False", "user login"))
+
+        runner.sandbox.run_test_async.assert_awaited_once_with("assert False", "test_user_login")
+        self.assertEqual(result.execution_mode, "sandbox")
+        self.assertFalse(result.success)
+        self.assertEqual(result.error, "FAILED")
+
+    def test_sandbox_batches_tests_and_retries_unreported_ones_alone(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+        runner.use_sandbox = True
+        runner.SANDBOX_BATCH_SIZE = 2
+        runner.sandbox = MagicMock()
+        ok = SandboxResult(success=True, output="OK", exit_code=0, duration=0.1)
+        runner.sandbox.run_tests_async = AsyncMock(side_effect=[[ok, None], [ok]])
+        runner.sandbox.run_test_async = AsyncMock(return_value=ok)
+        tests = [("assert 1", "a"), ("assert 2", "b"), ("def broken(:", "c"), ("assert 4", "d")]
+
+        results = asyncio.run(runner.run_tests_batch(tests))
+
+        self.assertEqual([r.test_name for r in results], ["a", "b", "c", "d"])
+        self.assertEqual([r.success for r in results], [True, True, False, True])
+        self.assertEqual(runner.sandbox.run_tests_async.await_count, 2)
+        runner.sandbox.run_test_async.assert_awaited_once_with("assert 2", "test_b")
+
+    def test_django_settings_read_once_from_manage_py(self):
+        (self.project_root / "manage.py").write_text(
+            "import os\n"
+            "def main():\n"
+            "    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')\n"
+        )
+
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+        (self.project_root / "manage.py").unlink()
+
+        self.assertEqual(runner._django_settings, "mysite.settings")
+        self.assertEqual(runner._detect_django_settings(), "")
+
+    def test_django_subprocess_env_is_built_once(self):
+        runner = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+
+        env = runner._subprocess_env
+
+        self.assertIs(runner._subprocess_env, env)
+        self.assertEqual(env['PYTHONPATH'].split(os.pathsep)[0], str(runner.project_path))
+        self.assertEqual(env['PYTHONDONTWRITEBYTECODE'], '1')
+
+    def test_django_settings_cached_across_runners_until_manage_py_changes(self):
+        manage_py = self.project_root / "manage.py"
+        manage_py.write_text("os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'a.settings')\n")
+        with patch('builtins.open', wraps=open) as mock_open:
+            first = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+            second = DjangoTestRunner(str(self.project_root), use_sandbox=False)
+        self.assertEqual((first._django_settings, second._django_settings), ("a.settings", "a.settings"))
+        self.assertEqual(mock_open.call_count, 1)
+
+        manage_py.write_text("os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'b.settings')\n")
+        os.utime(manage_py, ns=(0, manage_py.stat().st_mtime_ns + 1))
+        self.assertEqual(DjangoTestRunner(str(self.project_root), use_sandbox=False)._django_settings, "b.settings")
+
     @patch('runner.test_runner.DjangoTestRunner.run_test', new_callable=AsyncMock)
     def test_retry_logic(self, mock_run_test):
         # Mock a failed test result